@@ -0,0 +1,137 @@
+import os
+import threading
+import weakref
+
+# Per-job CPU accounting.
+# Finished jobs are reaped with os.wait4 so their exact user/system CPU time,
+# context switches and peak RSS come from the kernel's rusage. Jobs that are
+# still alive are sampled from /proc/<pid>/stat, keeping one open descriptor
+# per process and re-reading it with pread, which is a single syscall.
+
+try:
+    CLK_TCK = os.sysconf('SC_CLK_TCK')
+    PAGE_KB = os.sysconf('SC_PAGE_SIZE') // 1024
+except (AttributeError, ValueError, OSError):
+    CLK_TCK, PAGE_KB = 100, 4
+
+
+_reap_locks = weakref.WeakKeyDictionary() # proc -> lock serializing its wait4 and returncode
+_reap_locks_guard = threading.Lock()
+
+
+def _reap_lock(proc):
+    with _reap_locks_guard:
+        lock = _reap_locks.get(proc)
+        if lock is None:
+            lock = _reap_locks[proc] = threading.Lock()
+        return lock
+
+
+def reap(proc):
+    """Reap an exited child with wait4 and return its rusage.
+
+    Sets proc.returncode the way Popen.wait would. Returns None when the
+    platform has no wait4, the child was already reaped elsewhere, or an
+    event loop owns the child (proc.loop_reaped), in which case this just
+    waits for the loop to collect it. The check and the wait4 happen under
+    a per-process lock, so two threads never both wait for the same pid.
+    """
+    if getattr(proc, 'loop_reaped', False):
+        proc.wait()
+        return None
+    with _reap_lock(proc):
+        if proc.returncode is not None:
+            return None
+        if not hasattr(os, 'wait4'):
+            proc.wait()
+            return None
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        except ChildProcessError: ## someone else reaped it first
+            proc.wait()
+            return None
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        return usage
+
+
+def record_exit(job, usage):
+    """Store the rusage of a finished job in its job dict."""
+    if usage is None:
+        return
+    job['cpu_user'] = usage.ru_utime
+    job['cpu_sys'] = usage.ru_stime
+    job['ctx_switches'] = usage.ru_nvcsw + usage.ru_nivcsw
+    job['max_rss'] = usage.ru_maxrss ## KB on Linux
+
+
+def cpu_time(job):
+    """User + system CPU seconds recorded for job, or None if unknown."""
+    if 'cpu_user' not in job:
+        return None
+    return job['cpu_user'] + job['cpu_sys']
+
+
+class ProcStatSampler:
+    """Cheap repeated reads of /proc/<pid>/stat for live processes."""
+    def __init__(self):
+        self.fds = {} ## pid -> {file name: fd}, so forgetting a pid touches only its own fds
+
+    def _read(self, pid, name='stat'):
+        fds = self.fds.get(pid)
+        fd = fds.get(name) if fds else None
+        try:
+            if fd is None:
+                fd = os.open(f'/proc/{pid}/{name}', os.O_RDONLY)
+                self.fds.setdefault(pid, {})[name] = fd
+            return os.pread(fd, 4096, 0).decode()
+        except OSError: ## process gone, or no /proc on this platform
+            self.forget(pid)
+            return None
+
+    def sample(self, pid):
+        """Return (user seconds, system seconds, rss KB) or None."""
+        data = self._read(pid)
+        if not data:
+            return None
+        fields = data[data.rindex(')') + 2:].split() ## comm may contain spaces
+        return int(fields[11]) / CLK_TCK, int(fields[12]) / CLK_TCK, int(fields[21]) * PAGE_KB
+
+    def ctx_switches(self, pid):
+        data = self._read(pid, 'status')
+        if not data:
+            return None
+        total = 0
+        for line in data.splitlines():
+            if 'ctxt_switches:' in line:
+                total += int(line.split()[1])
+        return total
+
+    def update(self, job):
+        """Refresh the accounting fields of a live job from /proc."""
+        pid = job['proc'].pid
+        sample = self.sample(pid)
+        if sample is None:
+            return False
+        job['cpu_user'], job['cpu_sys'], rss = sample
+        job['max_rss'] = max(job.get('max_rss', 0), rss)
+        ctx = self.ctx_switches(pid)
+        if ctx is not None:
+            job['ctx_switches'] = ctx
+        return True
+
+    def forget(self, pid):
+        for fd in self.fds.pop(pid, {}).values():
+            os.close(fd)
+
+    def close(self):
+        for fds in self.fds.values():
+            for fd in fds.values():
+                os.close(fd)
+        self.fds.clear()
+
+
+def usage_summary(job):
+    if 'cpu_user' not in job:
+        return "cpu n/a"
+    return (f"cpu {job['cpu_user']:.2f}s user {job['cpu_sys']:.2f}s sys, "
+            f"{job.get('ctx_switches', 0)} ctx switches, max rss {job.get('max_rss', 0)} KB")
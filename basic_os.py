@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 import shlex
@@ -7,12 +8,22 @@ import win32api
 import win32con
 import ctypes
 from ctypes import wintypes
-from scheduler import RoundRobinScheduler, PriorityScheduler
+from scheduler import (RoundRobinScheduler, PriorityScheduler, SMPScheduler, MLFQScheduler,
+                       SRTFScheduler, FairShareScheduler, BurstPredictor, EventChannel,
+                       suspend_process, resume_process, terminate_process, control)
 import threading
 import time
+from contextlib import nullcontext
+from array import array
+from queue import SimpleQueue
 import process_sync
-from memory_manager import MemoryManager, PageFault
-from queue import Queue
+import sched_sim
+from jobs import JobRegistry
+from accounting import ProcStatSampler, usage_summary, reap, record_exit
+from sched_trace import tracer
+from memory_manager import MemoryManager, ShardedMemoryManager, PageFault, benchmark as mem_benchmark
+import mrc
+import memtrace
 
 ntdll = ctypes.WinDLL("ntdll")
 
@@ -24,15 +35,119 @@ NtResumeProcess = ntdll.NtResumeProcess
 NtResumeProcess.restype = wintypes.ULONG
 NtResumeProcess.argtypes = [wintypes.HANDLE]
 
+# New process group for every launched command, so the schedulers can stop
+# and continue a job with killpg. preexec_fn is never used: it is unsafe
+# once the shell has threads (stdin reader, executor). Python 3.11+ sets the
+# group directly; older versions start a new session, which also makes the
+# child a group leader.
+if sys.version_info >= (3, 11) and hasattr(os, 'setpgid'):
+    SPAWN_GROUP = {'process_group': 0}
+elif hasattr(os, 'setsid'):
+    SPAWN_GROUP = {'start_new_session': True}
+else:
+    SPAWN_GROUP = {}
+
+
+class JobProc:
+    """Popen-like view of a job's child process, reaped only by the shell's
+    event loop.
+
+    proc is either an asyncio subprocess (commands typed at the prompt) or
+    a Popen (run, runp). Every job keeps one of these in job['proc'] so the
+    schedulers and job-control builtins can treat all jobs alike, while the
+    loop stays the one place that waits for the child: poll() never calls
+    waitpid, and wait() (from any thread) waits for the loop's reaper.
+    """
+    loop_reaped = True ## accounting.reap must leave the wait to the event loop
+
+    def __init__(self, proc, args):
+        self.proc = proc
+        self.pid = proc.pid
+        self.args = args
+        self.returncode = None
+        self.exited = threading.Event()
+
+    def _exited(self, code):
+        if self.returncode is None:
+            self.returncode = code
+        self.exited.set()
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if not self.exited.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.returncode is None:
+            os.kill(self.pid, sig)
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(getattr(signal, 'SIGKILL', signal.SIGTERM))
+
+
+class DispatchStats:
+    """Time from reading a command line to the shell being ready for the next
+    one. Keeps running totals plus the last samples in a ring for percentiles.
+    Foreground commands count only until their process is started."""
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.samples = array('q', [0]) * capacity
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        self.samples[self.count % self.capacity] = ns
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def summary(self):
+        if not self.count:
+            return "No commands dispatched yet"
+        recent = sorted(self.samples[:min(self.count, self.capacity)])
+        p50 = recent[len(recent) // 2]
+        p99 = recent[min(len(recent) - 1, len(recent) * 99 // 100)]
+        return (f"{self.count} commands dispatched: mean {self.total / self.count / 1000:.1f}us, "
+                f"p50 {p50 / 1000:.1f}us, p99 {p99 / 1000:.1f}us, max {self.max / 1000:.1f}us")
+
+
+def default_shards(frames):
+    """One memory-manager shard per 64 frames, at most 8."""
+    return max(1, min(8, frames // 64))
+
+
+def _resolve(fut, result):
+    if not fut.done():
+        fut.set_result(result)
+
+
 class Shell:
     def __init__(self):
-        self.job_queue = Queue()           # unbounded; or Queue(maxsize=N) to limit # of jobs
-        self.jobs_lock  = threading.Lock()
-        self.jobs = [] # initialiing job array to help with process management
-        self.next_job_id = 1 # initializing first job id as 1 for first job    
+        self.sched_events = EventChannel() # arrival/exit events for the priority scheduler service
+        self.priority_service = None
+        self.sampler = ProcStatSampler() # reads live jobs' cpu time and rss from /proc
+        self.burst_predictor = BurstPredictor(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'burst_history.json'))
+        self.jobs = JobRegistry() # jobs indexed by id and pid; old finished ones are archived
+        self.jobs_lock = self.jobs.lock
         self.current_process = None # initializing current variable as null to track current process
         self.current_cmd = None # initializing current command variable as null to track current command
-        self.mm = MemoryManager(total_frames=10, algorithm='LRU') 
+        self.mm = ShardedMemoryManager(total_frames=10, algorithm='LRU', shards=default_shards(10))
+        self.mm_config = (10, 'LRU', 1, 0, 0, 'LRU') # frames, algorithm, levels, tlb entries, tlb ways, tlb policy
+        self.mm_lock = threading.Lock() # guards a plain MemoryManager (ws/pff allocation); the sharded one locks per pid
+        self.loop = None # the shell's asyncio event loop, set by main()
+        self.reapers = set() # one task per running job launched by the shell, waiting for it to exit
+        self.exit_waiters = {} # job id -> futures resolved when that job exits (fg)
+        self.notices = [] # job completion messages, printed before the next prompt
+        self.line_requests = SimpleQueue() # (prompt, future) pairs for the stdin reader thread
+        self.dispatch_stats = DispatchStats()
 
         # Define lists of commands that are supported by the OS
         self.builtins = {
@@ -56,46 +171,108 @@ class Shell:
             'pause':self.cmd_pause,
             'srr':  self.cmd_srr,
             'spri': self.cmd_spri,
+            'ssmp': self.cmd_ssmp, # round-robin across several cpus at once
+            'smlfq': self.cmd_smlfq, # multilevel feedback queue
+            'ssrtf': self.cmd_ssrtf, # shortest remaining (predicted) time first
+            'sfair': self.cmd_sfair, # proportional share through nice values
+            'simsched': self.cmd_simsched, # simulate a scheduling policy on a synthetic or recorded trace
+            'trace': self.cmd_trace, # control scheduler event tracing
             'runp': self.cmd_runp,
             'meminit': self.cmd_meminit,
             'memadd':  self.cmd_memadd,
             'memreq':  self.cmd_memreq,
             'memstats': self.cmd_memstats,
+            'memmrc': self.cmd_memmrc, # LRU miss-ratio curve for every frame count from one trace pass
+            'memcompare': self.cmd_memcompare, # fault counts of several policies against the OPT lower bound
+            'memreplay': self.cmd_memreplay, # stream a binary page-reference trace through the memory manager
+            'memalloc': self.cmd_memalloc, # global or per-process (working-set / page-fault-frequency) frame allocation
+            'membench': self.cmd_membench, # concurrent hit throughput: one lock vs the sharded manager
+            'ringbench': self.cmd_ringbench, # shared-memory ring vs Queue throughput and latency
+            'dp_demo': self.cmd_dp_demo, # dining philosophers contention metrics per strategy
+            'syncbench': self.cmd_syncbench, # reader-writer lock modes under read- and write-heavy mixes
+            'shstats': self.cmd_shstats, # command dispatch latency and job counts
+            'spawnbench': self.cmd_spawnbench, # launch many background jobs and measure launch rate and loop lag
         }
+        # Builtins that block (schedulers, benchmarks, interactive input) run in a
+        # worker thread so the event loop keeps reaping jobs while they run.
+        self.blocking = {'edit', 'srr', 'ssmp', 'smlfq', 'ssrtf', 'sfair', 'simsched', 'memmrc',
+                         'memcompare', 'memreplay', 'membench', 'ringbench', 'dp_demo', 'syncbench'}
 
     def run(self):
         print("Welcome to Team 4's Operating System! Enter a command to start")
+        try:
+            asyncio.run(self.main())
+        except KeyboardInterrupt:
+            print()
+
+    async def main(self):
+        self.loop = asyncio.get_running_loop()
+        if sys.version_info < (3, 12) and hasattr(asyncio, 'PidfdChildWatcher') and hasattr(os, 'pidfd_open'):
+            watcher = asyncio.PidfdChildWatcher() ## one pidfd per child instead of one thread
+            watcher.attach_loop(self.loop)
+            asyncio.set_child_watcher(watcher)
+        threading.Thread(target=self._read_lines, daemon=True).start()
         while True:
-            try:
-                cwd = os.getcwd()
-                line = input(f'{cwd} > ').strip()
-            except (EOFError, KeyboardInterrupt):
+            line = await self.readline(f'{os.getcwd()} > ')
+            if line is None:
                 print()
                 break
+            await self.dispatch(line)
 
-            if not line:
-                continue
-
-            background = line.endswith('&')
-            if background:
-                line = line[:-1].strip()
-
+    def _read_lines(self):
+        """Stdin reader thread: input() blocks here, never on the event loop."""
+        while True:
+            prompt, fut = self.line_requests.get()
+            try:
+                line = input(prompt)
+            except EOFError:
+                line = None
+            self.loop.call_soon_threadsafe(_resolve, fut, line)
+
+    async def readline(self, prompt):
+        for notice in self.notices:
+            print(notice)
+        self.notices.clear()
+        fut = self.loop.create_future()
+        self.line_requests.put((prompt, fut))
+        return await fut
+
+    async def dispatch(self, line):
+        """Run one command line: a builtin or an external command."""
+        start = time.perf_counter_ns()
+        line = line.strip()
+        background = line.endswith('&')
+        if background:
+            line = line[:-1].strip()
+        try:
             parts = shlex.split(line)
-            if not parts:
-                continue
-            cmd, *args = parts
+        except ValueError as e:
+            print(f"Syntax error: {e}")
+            return
+        if not parts:
+            return
+        cmd, *args = parts
 
-            if cmd in self.builtins:
-                self.builtins[cmd](args)
+        if cmd not in self.builtins:
+            await self.launch_cmd(parts, background, start)
+            return
+        try: ## a failing builtin reports its error instead of ending the event loop
+            if cmd in self.blocking:
+                await self.loop.run_in_executor(None, self.builtins[cmd], args)
             else:
-                self.launch_cmd(parts, background)
+                result = self.builtins[cmd](args)
+                if asyncio.iscoroutine(result):
+                    await result
+                else:
+                    self.dispatch_stats.record(time.perf_counter_ns() - start)
+        except Exception as e:
+            print(f"{cmd}: {type(e).__name__}: {e}")
 
-    def launch_cmd(self, parts, background): # method to start the command line shell
+    async def launch_cmd(self, parts, background, start=None): # method to start the command line shell
+        if start is None:
+            start = time.perf_counter_ns()
         try:
-            proc = subprocess.Popen(
-                parts,
-                preexec_fn=os.setpgrp if hasattr(os, 'setpgrp') else None
-            )
+            proc = JobProc(await asyncio.create_subprocess_exec(*parts, **SPAWN_GROUP), parts)
         except FileNotFoundError:
             print(f"{parts[0]}: command not found")
             return
@@ -107,19 +284,93 @@ class Shell:
         self.current_cmd = ' '.join(parts)
 
         if background:
-            self.jobs.append({
-                'id': self.next_job_id,
-                'proc': proc,
-                'cmd': self.current_cmd,
-                'status': 'Running'
-            })
-            print(f"[{self.next_job_id}] {proc.pid}")
-            self.next_job_id += 1
+            job = self.jobs.add(proc, self.current_cmd)
+            self.watch(job)
+            print(f"[{job['id']}] {proc.pid}")
             self.current_process = None
+            self.dispatch_stats.record(time.perf_counter_ns() - start)
         else:
-            proc.wait()
+            self.dispatch_stats.record(time.perf_counter_ns() - start)
+            proc._exited(await proc.proc.wait())
             self.current_process = None
 
+    def watch(self, job):
+        """Reap job's process as soon as it exits and update the job's status.
+
+        Jobs launched from the prompt are awaited by a task; Popen jobs
+        (run, runp) are watched through a pidfd and reaped with wait4 so
+        their rusage is kept. Either way the loop is the only reaper. Safe to
+        call from any thread.
+        """
+        if self.loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not self.loop:
+            self.loop.call_soon_threadsafe(self.watch, job)
+            return
+        proc = job['proc']
+        if not isinstance(proc.proc, subprocess.Popen):
+            task = self.loop.create_task(self._reap_async(job))
+        else:
+            try:
+                fd = os.pidfd_open(proc.pid)
+                self.loop.add_reader(fd, self._reap_popen, job, fd)
+                return
+            except (AttributeError, OSError): ## no pidfd support, or already reaped
+                task = self.loop.create_task(self._poll_popen(job))
+        self.reapers.add(task)
+        task.add_done_callback(self.reapers.discard)
+
+    async def _reap_async(self, job):
+        proc = job['proc']
+        proc._exited(await proc.proc.wait())
+        self._job_done(job)
+
+    def _reap_popen(self, job, fd):
+        self.loop.remove_reader(fd)
+        os.close(fd)
+        popen = job['proc'].proc
+        record_exit(job, reap(popen)) ## already a zombie, this only reaps it
+        job['proc']._exited(popen.returncode) ## after record_exit, so waiters see the rusage
+        self._job_done(job)
+
+    async def _poll_popen(self, job):
+        popen = job['proc'].proc
+        while popen.poll() is None:
+            await asyncio.sleep(0.1)
+        job['proc']._exited(popen.returncode)
+        self._job_done(job)
+
+    def _job_done(self, job):
+        code = job['proc'].returncode
+        self.jobs.finish(job)
+        self.sampler.forget(job['proc'].pid)
+        control.forget(job['proc'].pid)
+        if 'priority' in job:
+            self.post_sched('exit', job) ## drop it from the priority service's ready queue
+        for fut in self.exit_waiters.pop(job['id'], ()):
+            _resolve(fut, code)
+        self.notices.append(f"[{job['id']}] {job['status']} {job['cmd']}")
+
+    def post_sched(self, kind, job):
+        """Pass an event to the priority service. Nothing is queued while the
+        service is not running; it picks up runp jobs from the registry when
+        it starts."""
+        if self.priority_service is not None and self.priority_service.is_alive():
+            self.sched_events.put(kind, job)
+
+    def job_exit(self, job):
+        """Future resolved with job's exit code once it has been reaped."""
+        fut = self.loop.create_future()
+        if job['proc'].returncode is not None:
+            fut.set_result(job['proc'].returncode)
+        else:
+            self.exit_waiters.setdefault(job['id'], []).append(fut)
+        return fut
+
     #============START OF IMPLEMENTATION OF COMMAND FUNCTIONS=================#
 
     ## Change directory
@@ -264,51 +515,70 @@ class Shell:
             print("kill: missing or invalid job ID")
             return
 
-        for job in self.jobs:
-            if job['id'] == jid:
-                proc = job['proc']
-                if proc.poll() is not None:
-                    print(f"kill: job {jid} is already terminated")
-                    return
-                try:
-                    try:
-                        os.kill(proc.pid, signal.SIGTERM)
-                    except Exception:
-                        # Fallback for Windows
-                        handle = win32api.OpenProcess(win32con.PROCESS_TERMINATE, False, proc.pid)
-                        win32api.TerminateProcess(handle, -1)
-                        win32api.CloseHandle(handle)
-
-                    job['status'] = 'Killed'
-                    print(f"Job [{jid}] (PID {proc.pid}) terminated.")
-                    return
-                except Exception as e:
-                    print(f"kill: failed to terminate job {jid}: {e}")
-                    return
-
-        print(f"kill: job {jid} not found")
+        job = self.jobs.get(jid)
+        if job is None:
+            print(f"kill: job {jid} not found")
+            return
+        proc = job['proc']
+        if self.jobs.is_finished(job):
+            print(f"kill: job {jid} is already terminated")
+            return
+        try:
+            try:
+                terminate_process(proc) ## the whole group, continued so a stopped job sees it
+            except Exception:
+                # Fallback for Windows
+                handle = win32api.OpenProcess(win32con.PROCESS_TERMINATE, False, proc.pid)
+                win32api.TerminateProcess(handle, -1)
+                win32api.CloseHandle(handle)
+        except Exception as e:
+            print(f"kill: failed to terminate job {jid}: {e}")
+            return
+        if self.jobs.set_status(job, 'Killed'):
+            self.post_sched('exit', job)
+            print(f"Job [{jid}] (PID {proc.pid}) terminated.")
+        else:
+            print(f"kill: job {jid} is already terminated")
 
     ## List jobs
     def cmd_jobs(self, args):
-        if not self.jobs:
+        # Usage: jobs [-a]   (-a also lists the summaries of archived jobs)
+        if not self.jobs and not self.jobs.archived:
             print("No jobs found")
+        if args[:1] == ['-a']:
+            for rec in self.jobs.archive:
+                cpu = "cpu n/a" if rec.cpu is None else f"cpu {rec.cpu:.2f}s"
+                print(f"[{rec.id}] | {rec.status} | {rec.cmd} | {cpu} (archived)")
         for job in self.jobs:
-            print(f"[{job['id']}] | {job['status']} | {job['cmd']}")
+            if job['proc'].returncode is None:
+                self.sampler.update(job)
+            else:
+                self.sampler.forget(job['proc'].pid)
+            print(f"[{job['id']}] | {job['status']} | {job['cmd']} | {usage_summary(job)}")
+        if self.jobs.summary():
+            print(self.jobs.summary())
 
     ## bring background job to the foreground
-    def cmd_fg(self, args):
-        jid = int(args[0])
-        for job in list(self.jobs):
-            if job['id'] == jid:
-                proc = job['proc']
-                try:
-                    os.kill(proc.pid, signal.SIGCONT)
-                except Exception:
-                    pass
-                print(f"Brining process to the foreground: {jid}")
-                proc.wait()
-                return
-        print(f"fg: job {jid} not found")
+    async def cmd_fg(self, args):
+        try:
+            jid = int(args[0])
+        except (IndexError, ValueError):
+            print("fg: missing or invalid job id")
+            return
+        job = self.jobs.get(jid)
+        if job is None:
+            print(f"fg: job {jid} not found")
+            return
+        if self.jobs.is_finished(job): ## its pid may already belong to another process
+            print(f"fg: job {jid} has already finished")
+            return
+        try:
+            os.kill(job['proc'].pid, signal.SIGCONT)
+        except Exception:
+            pass
+        self.jobs.set_status(job, 'Running')
+        print(f"Brining process to the foreground: {jid}")
+        await self.job_exit(job)
 
 
     ## resume background job
@@ -319,23 +589,23 @@ class Shell:
             print("bg: missing or invalid job id")
             return
 
-        for job in self.jobs:
-            if job['id'] == jid:
-                proc = job['proc']
-                if proc.poll() is None:
-                    try:
-                        handle = win32api.OpenProcess(win32con.PROCESS_ALL_ACCESS, False, proc.pid)
-                        NtResumeProcess(handle.handle)
-                        win32api.CloseHandle(handle)
-                        job['status'] = 'Running' ## Changing the status to running for resumed job
-                        print(f"[{jid}] {proc.pid} resumed in background")
-                    except Exception as e:
-                        print(f"bg: failed to resume job [{jid}]: {e}")
-                else:
-                    print(f"bg: job [{jid}] is not running")
-                return
-
-        print(f"bg: job {jid} not found")
+        job = self.jobs.get(jid)
+        if job is None:
+            print(f"bg: job {jid} not found")
+            return
+        proc = job['proc']
+        if self.jobs.is_finished(job):
+            print(f"bg: job [{jid}] is not running")
+            return
+        try:
+            resume_process(proc) ## continues the job's whole process group
+        except Exception as e:
+            print(f"bg: failed to resume job [{jid}]: {e}")
+            return
+        if self.jobs.set_status(job, 'Running'): ## Changing the status to running for resumed job
+            print(f"[{jid}] {proc.pid} resumed in background")
+        else:
+            print(f"bg: job [{jid}] is not running")
 
 
     ## Run a program in the bakcground
@@ -349,20 +619,10 @@ class Shell:
         else:
             cmd = [path] + args[1:]
         try:
-            proc = subprocess.Popen(cmd, preexec_fn=os.setpgrp if hasattr(os, 'setpgrp') else None)
-            now = time.time()
-            self.jobs.append({
-                'id': self.next_job_id,
-                'proc': proc,
-                'cmd': ' '.join(cmd),
-                'status':'Running',
-                'create_time':    now,
-                'first_scheduled': None,    
-                'run_time':       0.0,       
-                'completion_time': None
-            })
-            print(f"[{self.next_job_id}] {proc.pid}")
-            self.next_job_id += 1
+            proc = JobProc(subprocess.Popen(cmd, **SPAWN_GROUP), cmd)
+            job = self.jobs.add(proc, ' '.join(cmd))
+            self.watch(job)
+            print(f"[{job['id']}] {proc.pid}")
         except Exception as e:
             print(f"run: failed to execute {path}: {e}")
 
@@ -382,30 +642,14 @@ class Shell:
         cmd = [sys.executable, path] + rest if path.endswith('.py') else [path] + rest
 
         try:
-            proc = subprocess.Popen(
-                cmd,
-                preexec_fn=os.setpgrp if hasattr(os, 'setpgrp') else None
-            )
-            now = time.time()
-            self.jobs.append({
-                'id':       self.next_job_id,
-                'proc':     proc,
-                'cmd':      ' '.join(cmd),
-                'status':   'Running',
-                'priority': prio,
-                'create_time':    now,
-                'first_scheduled': None,    
-                'run_time':       0.0,       
-                'completion_time': None
-            })
-            with self.jobs_lock:
-                self.jobs.append(self.jobs)
-                self.next_job_id += 1
-
-            # hand off into the scheduler’s queue
-            self.job_queue.put(self.jobs)
-
-            print(f"[{self.jobs['id']}] {proc.pid} (priority {prio}) queued")
+            proc = JobProc(subprocess.Popen(cmd, **SPAWN_GROUP), cmd)
+            job = self.jobs.add(proc, ' '.join(cmd), priority=prio)
+            self.watch(job)
+
+            # hand off into the scheduler's event channel
+            self.post_sched('arrive', job)
+
+            print(f"[{job['id']}] {proc.pid} (priority {prio}) queued")
         except Exception as e:
             print(f"runp: failed to execute {' '.join(cmd)}: {e}")
 
@@ -418,68 +662,345 @@ class Shell:
             print("pause: missing or invalid job id")
             return
 
-        for job in self.jobs:
-            if job['id'] == jid:
-                proc = job['proc']
-                if proc.poll() is None:
-                    try:
-                        handle = win32api.OpenProcess(win32con.PROCESS_ALL_ACCESS, False, proc.pid)
-                        NtSuspendProcess(handle.handle)
-                        win32api.CloseHandle(handle)
-                        job['status'] = 'Paused' ## Setting status as paused
-                        print(f"Job [{jid}] paused")
-                    except Exception as e:
-                        print(f"pause: failed to pause job [{jid}]: {e}")
-                else:
-                    print(f"pause: job [{jid}] is not running")
-                return
-
-        print(f"pause: job {jid} not found")
+        job = self.jobs.get(jid)
+        if job is None:
+            print(f"pause: job {jid} not found")
+            return
+        proc = job['proc']
+        if self.jobs.is_finished(job):
+            print(f"pause: job [{jid}] is not running")
+            return
+        try:
+            suspend_process(proc) ## stops the job's whole process group
+        except Exception as e:
+            print(f"pause: failed to pause job [{jid}]: {e}")
+            return
+        if self.jobs.set_status(job, 'Paused'): ## Setting status as paused
+            print(f"Job [{jid}] paused")
+        else:
+            print(f"pause: job [{jid}] is not running")
 
     def cmd_srr(self, args):
+        # Usage: srr <quantum> [event|sleep]
         try:
             q = float(args[0])
         except:
-            print("Usage: srr <quantum>")
+            print("Usage: srr <quantum> [event|sleep]")
+            return
+        mode = args[1] if len(args) > 1 else 'event'
+        RoundRobinScheduler(self.jobs, q, event_driven=(mode != 'sleep')).run()
+
+    def cmd_ssmp(self, args):
+        # Usage: ssmp <quantum> [ncpus]
+        try:
+            q = float(args[0])
+            ncpus = int(args[1]) if len(args) > 1 else None
+        except (IndexError, ValueError):
+            print("Usage: ssmp <quantum> [ncpus]")
             return
-        RoundRobinScheduler(self.jobs, q).run()
+        SMPScheduler(self.jobs, q, ncpus).run()
+
+    def cmd_smlfq(self, args):
+        # Usage: smlfq <quantum> [levels] [boost_interval]
+        try:
+            q = float(args[0])
+            levels = int(args[1]) if len(args) > 1 else 3
+            boost = float(args[2]) if len(args) > 2 else 5.0
+            scheduler = MLFQScheduler(self.jobs, q, levels, boost)
+        except (IndexError, ValueError): ## also levels < 1 or a non-positive quantum or interval
+            print("Usage: smlfq <quantum> [levels] [boost_interval]")
+            return
+        scheduler.run()
+
+    def cmd_ssrtf(self, args):
+        # Usage: ssrtf [alpha]
+        if args:
+            try:
+                self.burst_predictor.alpha = float(args[0])
+            except ValueError:
+                print("Usage: ssrtf [alpha]")
+                return
+        SRTFScheduler(self.jobs, self.burst_predictor).run()
+
+    def cmd_sfair(self, args):
+        # Usage: sfair [interval]
+        try:
+            interval = float(args[0]) if args else 1.0
+        except ValueError:
+            print("Usage: sfair [interval]")
+            return
+        FairShareScheduler(self.jobs, interval).run()
+
+    def cmd_simsched(self, args):
+        # Usage: simsched <rr|priority|mlfq> <njobs|trace.csv|jobs> [quantum] [load]
+        # load sets the offered load of a synthetic trace (mean burst per mean interarrival)
+        if len(args) < 2:
+            print("Usage: simsched <rr|priority|mlfq> <njobs|trace.csv|jobs> [quantum] [load]")
+            return
+        policy, source = args[0].lower(), args[1]
+        try:
+            quantum = float(args[2]) if len(args) > 2 else 1.0
+            if source == 'jobs':
+                trace = sched_sim.JobTrace.from_jobs(self.jobs)
+            elif source.isdigit():
+                load = float(args[3]) if len(args) > 3 else 0.8
+                if load <= 0:
+                    raise ValueError("load must be positive")
+                trace = sched_sim.JobTrace.synthetic(int(source), mean_burst=load)
+            else:
+                trace = sched_sim.JobTrace.load(source)
+            load = trace.offered_load()
+            print(f"Offered load: {load:.2f}" + (" (at or above 1 the queue keeps growing)" if load >= 1 else ""))
+            extra = [] if policy == 'priority' else [quantum]
+            sched_sim.simulate(policy, trace, *extra).report(per_job=len(trace) <= 20)
+        except Exception as e:
+            print(f"simsched: {e}")
+
+    def cmd_trace(self, args):
+        # Usage: trace on|off|clear|quiet|verbose|dump <file.json>
+        action = args[0] if args else ''
+        if action in ('on', 'off'):
+            tracer.enabled = action == 'on'
+            print(f"Scheduler tracing {action}")
+        elif action in ('quiet', 'verbose'):
+            tracer.verbose = action == 'verbose'
+            print(f"Scheduler messages {'on' if tracer.verbose else 'off'}")
+        elif action == 'clear':
+            tracer.clear()
+            print("Trace buffer cleared")
+        elif action == 'dump' and len(args) > 1:
+            try:
+                tracer.dump_chrome(args[1])
+                print(f"{min(tracer.count, tracer.capacity)} events written to {args[1]}")
+            except OSError as e:
+                print(f"trace: {e}")
+        else:
+            print("Usage: trace on|off|clear|quiet|verbose|dump <file.json>")
 
     def cmd_spri(self, args):
-        scheduler = PriorityScheduler(self.jobs) ## creating the scheduler, will need to start it in a thread for dynamic scheduling
-        t = threading.Thread(target=scheduler.run, daemon=True) ## Initialize the thread
-        t.start() ## start the thread
+        if self.priority_service is not None and self.priority_service.is_alive():
+            print("Priority scheduler is already running.")
+            return
+        self.start_priority_service()
         print("Priority scheduler started in background.")
 
     def cmd_meminit(self, args):
-       # Usage: meminit <frames> <FIFO|LRU>
+       # Usage: meminit <frames> [algorithm] [levels] [tlb_entries] [tlb_ways] [LRU|RANDOM] [shards]
        if len(args)>=1:
-           frames = int(args[0])
-           algo = args[1] if len(args)>1 else 'FIFO'
-           self.mm = MemoryManager(frames, algo)
-           print(f"Memory manager initialized: {frames} frames, {algo}")
+           try:
+               frames = int(args[0])
+               algo = args[1] if len(args)>1 else 'FIFO'
+               levels = int(args[2]) if len(args)>2 else 1
+               tlb_entries = int(args[3]) if len(args)>3 else 0
+               tlb_ways = int(args[4]) if len(args)>4 else 0
+               tlb_policy = args[5] if len(args)>5 else 'LRU'
+               shards = int(args[6]) if len(args)>6 else default_shards(frames)
+               mm = ShardedMemoryManager(frames, algo, shards, levels, tlb_entries, tlb_ways, tlb_policy)
+               with self.mm_lock:
+                   self.mm = mm
+                   self.mm_config = (frames, algo, levels, tlb_entries, tlb_ways, tlb_policy)
+           except ValueError as e:
+               print(f"meminit: {e}")
+               return
+           print(f"Memory manager initialized: {frames} frames, {algo}, {shards} shards")
        else:
-           print("Usage: meminit <frames> [FIFO|LRU]")
+           print("Usage: meminit <frames> [FIFO|LRU|CLOCK|SC|LFU|2Q|ARC] [levels] [tlb_entries] [tlb_ways] [LRU|RANDOM] [shards]")
+           print("  Pids are spread over shards, each with its own lock and replacement; a fault")
+           print("  evicts from its own shard, not the least valuable page overall. shards=1 gives")
+           print("  exact global replacement behind one lock.")
+
+    def mm_guard(self, mm):
+        """Lock to hold while using mm: the sharded manager locks per pid itself."""
+        return nullcontext() if isinstance(mm, ShardedMemoryManager) else self.mm_lock
+
+    def cmd_memalloc(self, args):
+       # Usage: memalloc <global|ws|pff> [window] [pff_low] [pff_high]
+       if not args:
+           print("Usage: memalloc <global|ws|pff> [window] [pff_low] [pff_high]")
+           return
+       frames, algo = self.mm_config[:2]
+       try:
+           window = int(args[1]) if len(args)>1 else 1000
+           pff_low = float(args[2]) if len(args)>2 else 0.01
+           pff_high = float(args[3]) if len(args)>3 else 0.1
+           if args[0].upper() == 'GLOBAL':
+               new_mm = ShardedMemoryManager(frames, algo, default_shards(frames), *self.mm_config[2:])
+           else: ## per-process quotas need the whole pool in one manager
+               new_mm = MemoryManager(*self.mm_config, args[0], window, pff_low, pff_high)
+               new_mm.thrash_handler = self.on_thrashing
+       except ValueError as e:
+           print(f"memalloc: {e}")
+           return
+       with self.mm_lock:
+           self.mm = new_mm
+       print(f"Memory manager reinitialized: {frames} frames, {algo}, {args[0].upper()} allocation")
+
+    def on_thrashing(self, pid, thrashing):
+        # Called by the memory manager. Only a pid that is a job's OS process id
+        # is acted on; synthetic pids (memadd) are just marked in memstats.
+        job = self.jobs.find_pid(pid)
+        if job is None:
+            return
+        proc = job['proc']
+        if proc.returncode is not None:
+            return
+        try:
+            if thrashing:
+                suspend_process(proc) ## give its frames a chance to go to the others
+                self.jobs.set_status(job, 'Suspended (thrashing)')
+                print(f"Job [{job['id']}] suspended: thrashing")
+            elif job['status'] == 'Suspended (thrashing)':
+                resume_process(proc)
+                self.jobs.set_status(job, 'Running')
+                print(f"Job [{job['id']}] resumed: fault rate recovered")
+        except Exception as e:
+            print(f"Memory: failed to {'suspend' if thrashing else 'resume'} job [{job['id']}]: {e}")
 
     def cmd_memadd(self, args):
        # Usage: memadd <pid>
-        pid = int(args[0])
-        with self.mm_lock:
-            self.mm.add_process(pid)
-        print(f"PID {pid} added")
+       try:
+           pid = int(args[0])
+       except (IndexError, ValueError):
+           print("Usage: memadd <pid>")
+           return
+       mm = self.mm
+       with self.mm_guard(mm):
+           mm.add_process(pid)
+       print(f"PID {pid} added")
 
     def cmd_memreq(self, args):
        # Usage: memreq <pid> <page>
        try:
            pid, page = map(int, args)
-           hit = self.mm.access_page(pid, page)
-           print(f"PID {pid} page {page} hit (in frame {self.mm.page_table[pid][page]})")
+           mm = self.mm
+           with self.mm_guard(mm):
+               mm.access_page(pid, page)
+               frame = mm.frame_of(pid, page)
+           print(f"PID {pid} page {page} hit (in frame {frame})")
        except PageFault as pf:
            print(pf)
        except Exception as e:
            print(f"memreq error: {e}")
 
     def cmd_memstats(self, args):
-       print(self.mm.stats())
+       # Usage: memstats [pages] | memstats export <file.csv|file.json>
+       if args and args[0] == 'export':
+           if len(args) < 2:
+               print("Usage: memstats export <file.csv|file.json>")
+               return
+           try:
+               mm = self.mm
+               with self.mm_guard(mm):
+                   mm.export_series(args[1])
+           except OSError as e:
+               print(f"memstats: {e}")
+               return
+           print(f"Fault-rate history written to {args[1]}")
+           return
+       mm = self.mm
+       with self.mm_guard(mm):
+           text = mm.stats(pages='pages' in args)
+       print(text)
+
+    def cmd_memmrc(self, args):
+       # Usage: memmrc <trace> [max_frames] [sample_rate] [out.csv]
+       if not args:
+           print("Usage: memmrc <trace> [max_frames] [sample_rate] [out.csv]")
+           return
+       try:
+           max_frames = int(args[1]) if len(args) > 1 else self.mm.total_frames
+           rate = float(args[2]) if len(args) > 2 else 1.0
+           faults, refs = mrc.miss_ratio_curve(mrc.load_trace(args[0]), max_frames, rate)
+       except (OSError, ValueError) as e:
+           print(f"memmrc: {e}")
+           return
+       if len(args) > 3:
+           mrc.write_curve(args[3], faults, refs)
+           print(f"Curve for {refs} references written to {args[3]}")
+           return
+       print(f"{refs} references")
+       for frames, n in enumerate(faults, 1):
+           ratio = n / refs if refs else 0.0
+           print(f"{frames:6d} frames: {round(n):10d} faults, miss ratio {ratio:.4f}")
+
+    def cmd_memcompare(self, args):
+       # Usage: memcompare <trace> <frames> [algorithms...]
+       if len(args) < 2:
+           print("Usage: memcompare <trace> <frames> [algorithms...]")
+           return
+       try:
+           trace = list(mrc.load_trace(args[0]))
+           frames = int(args[1])
+           algos = args[2:] or ['FIFO', 'LRU']
+           results = [(a.upper(), MemoryManager(frames, a).replay(trace)) for a in algos]
+           best = MemoryManager.optimal(frames, trace).replay(trace)
+       except (OSError, ValueError) as e:
+           print(f"memcompare: {e}")
+           return
+       print(f"{len(trace)} references, {frames} frames")
+       print(f"  OPT: {best} faults")
+       for name, faults in results:
+           extra = f"{100.0 * (faults - best) / best:.1f}% above OPT" if best else ""
+           print(f"  {name}: {faults} faults {extra}")
+
+    def cmd_memreplay(self, args):
+       # Usage: memreplay <file>
+       if not args:
+           print("Usage: memreplay <file>")
+           return
+       try:
+           mm = self.mm
+           with self.mm_guard(mm):
+               refs, faults, secs = memtrace.replay(mm, args[0])
+       except (OSError, ValueError) as e:
+           print(f"memreplay: {e}")
+           return
+       rate = refs / secs if secs > 0 else 0.0
+       print(f"Replayed {refs} references: {faults} faults in {secs:.2f}s ({rate:,.0f} refs/s)")
+
+    def cmd_membench(self, args):
+       # Usage: membench [max_threads] [shards] [refs]
+       try:
+           max_threads = int(args[0]) if args else 8
+           shards = int(args[1]) if len(args)>1 else 8
+           refs = int(args[2]) if len(args)>2 else 200000
+       except ValueError:
+           print("Usage: membench [max_threads] [shards] [refs]")
+           return
+       threads = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= max_threads] or [1]
+       print(f"{refs} hits per run, {shards} shards")
+       print(f"{'threads':>8} {'one lock':>14} {'sharded':>14}")
+       for n, locked, sharded in mem_benchmark(threads=threads, shards=shards, refs=refs):
+           print(f"{n:8d} {locked:12,.0f}/s {sharded:12,.0f}/s")
+
+    def cmd_ringbench(self, args):
+       # Usage: ringbench [items] [batch]
+       try:
+           items = int(args[0]) if args else 100000
+           batch = int(args[1]) if len(args)>1 else 32
+       except ValueError:
+           print("Usage: ringbench [items] [batch]")
+           return
+       print(f"{'channel':>22} {'slots':>6} {'prod':>5} {'cons':>5} {'items/s':>12} {'mean us':>10} {'p99 us':>10}")
+       for r in process_sync.channel_benchmark(items=items, batch=batch):
+           print(f"{r['channel']:>22} {r['slots']:6d} {r['producers']:5d} {r['consumers']:5d} "
+                 f"{r['items_per_sec']:12,.0f} {r['latency_mean_us']:10.1f} {r['latency_p99_us']:10.1f}")
+
+    def cmd_syncbench(self, args):
+       # Usage: syncbench [max_threads] [seconds]
+       try:
+           max_threads = int(args[0]) if args else 8
+           seconds = float(args[1]) if len(args)>1 else 0.5
+       except ValueError:
+           print("Usage: syncbench [max_threads] [seconds]")
+           return
+       threads = [n for n in (1, 2, 4, 8, 16, 32) if n <= max_threads] or [1]
+       print(f"{'mix':>12} {'threads':>8} {'mode':>7} {'ops/s':>12} {'read waits':>11} {'write waits':>12}")
+       for r in process_sync.rwlock_benchmark(threads=threads, seconds=seconds):
+           c = r['contention']
+           reads = f"{c['read']['contended_ratio']:.1%}" if c else '-'
+           writes = f"{c['write']['contended_ratio']:.1%}" if c else '-'
+           print(f"{r['mix']:>12} {r['threads']:8d} {r['mode']:>7} {r['ops_per_sec']:12,.0f} {reads:>11} {writes:>12}")
 
     def cmd_pc_demo(self, args):
        buf = int(args[0]) if args else 5
@@ -487,61 +1008,68 @@ class Shell:
        process_sync.producer_consumer(buf, items)
 
     def cmd_dp_demo(self, args):
-       n = int(args[0]) if args else 5
-       process_sync.dining_philosophers(n)
+       # Usage: dp_demo [n] [ordering|waiter|chandy-misra|trylock|all] [seconds]
+       try:
+           n = int(args[0]) if args else 5
+           strategy = args[1] if len(args)>1 else 'all'
+           seconds = float(args[2]) if len(args)>2 else 1.0
+           strategies = list(process_sync.PHILOSOPHER_STRATEGIES) if strategy == 'all' else [strategy]
+           results = process_sync.philosophers_benchmark((n,), strategies, seconds)
+       except ValueError as e:
+           print(f"dp_demo: {e}")
+           return
+       print(f"{n} philosophers, {seconds}s per strategy")
+       print(f"{'strategy':>13} {'meals/s':>10} {'wait mean us':>13} {'p99 us':>9} {'max us':>10} {'meal var':>10} {'min':>6} {'max':>6}")
+       for r in results:
+           print(f"{r['strategy']:>13} {r['meals_per_sec']:10,.0f} {r['wait_mean_us']:13.1f} {r['wait_p99_us']:9.1f} "
+                 f"{r['wait_max_us']:10.1f} {r['meal_variance']:10.1f} {r['meals_min']:6d} {r['meals_max']:6d}")
+
+    def cmd_shstats(self, args):
+        print(self.dispatch_stats.summary())
+        print(f"{self.jobs.launched} jobs launched, {self.jobs.running()} still running, "
+              f"{len(self.jobs)} in the job table, {len(self.reapers)} reaper tasks")
+
+    async def cmd_spawnbench(self, args):
+        # Usage: spawnbench [n] [command...]
+        try:
+            n = int(args[0]) if args else 1000
+        except ValueError:
+            print("Usage: spawnbench [n] [command...]")
+            return
+        parts = args[1:] or ['true']
+        lags = array('d')
+        done = asyncio.Event()
+
+        async def ticker(): ## how late the loop runs a 1 ms timer while jobs start and exit
+            while not done.is_set():
+                t = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append(time.perf_counter() - t - 0.001)
+
+        tick = self.loop.create_task(ticker())
+        start = time.perf_counter()
+        procs = []
+        try:
+            for _ in range(n):
+                procs.append(await asyncio.create_subprocess_exec(*parts, **SPAWN_GROUP))
+        except Exception as e:
+            print(f"spawnbench: {e}")
+        launched = time.perf_counter() - start
+        await asyncio.gather(*(p.wait() for p in procs))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await tick
+        lags = sorted(lags) or [0.0]
+        print(f"{len(procs)} x {' '.join(parts)}: launched {len(procs) / max(launched, 1e-9):,.0f}/s, "
+              f"all reaped after {elapsed:.2f}s")
+        print(f"loop lag while running: p50 {lags[len(lags) // 2] * 1000:.2f}ms, "
+              f"p99 {lags[len(lags) * 99 // 100] * 1000:.2f}ms, max {lags[-1] * 1000:.2f}ms")
 
     def start_priority_service(self):
-        """Start one background thread that will continuously consume jobs."""
-        t = threading.Thread(target=self._priority_loop, daemon=True)
-        t.start()
-
-    def _priority_loop(self):
-        from schedulers import suspend_process, resume_process  # or adjust imports
-        import time, heapq
-
-        active = []
-        while True:
-            # 1) If no active jobs, block waiting for at least one
-            if not active:
-                job = self.job_queue.get()
-                active.append(job)
-                self.job_queue.task_done()
-
-            # 2) Build a heap of all currently alive jobs by priority
-            active = [j for j in active if j['proc'].poll() is None]
-            for _ in range(self.job_queue.qsize()):
-                j = self.job_queue.get_nowait()
-                active.append(j)
-                self.job_queue.task_done()
-
-            heap = [(-j['priority'], j) for j in active]
-            heapq.heapify(heap)
-
-            # 3) Pick highest‐priority job
-            _, job = heapq.heappop(heap)
-            active = [j for _, j in heap]  # remaining
-            proc = job['proc']
-
-            # 4) Run it until it finishes or a higher-priority job arrives
-            resume_process(proc)
-            while proc.poll() is None:
-                try:
-                    # non-blocking check for a new job
-                    new = self.job_queue.get_nowait()
-                    active.append(new)
-                    self.job_queue.task_done()
-                    # if new job outranks current, preempt
-                    if new['priority'] > job['priority']:
-                        suspend_process(proc)
-                        active.append(job)
-                        job = new
-                        proc = job['proc']
-                        resume_process(proc)
-                except:
-                    pass
-                time.sleep(0.1)
-
-            # it finished—loop around to pick the next one
+        """Start one background thread that keeps scheduling jobs as they arrive."""
+        scheduler = PriorityScheduler(list(self.jobs), self.sched_events) ## new jobs from runp arrive through the event channel
+        self.priority_service = threading.Thread(target=scheduler.serve, daemon=True)
+        self.priority_service.start()
 
 if __name__ == '__main__':
     Shell().run()
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+
+# Job table for the shell.
+# Jobs are dicts (the schedulers read and write their fields) indexed by job
+# id and by pid, so job control never scans. Status changes go through the
+# registry's methods under its lock. Finished jobs stay in the table until
+# more than keep_finished have piled up; then the oldest are archived into
+# fixed-size JobRecord summaries (dropping the process object and its
+# pipes), of which the newest archive_limit are kept, so the shell's memory
+# stays bounded however many jobs it launches.
+
+
+class JobRecord:
+    """Compact summary of an archived job."""
+    __slots__ = ('id', 'pid', 'cmd', 'status', 'returncode', 'create_time', 'completion_time', 'cpu')
+
+    def __init__(self, job):
+        proc = job['proc']
+        self.id = job['id']
+        self.pid = proc.pid
+        self.cmd = job['cmd']
+        self.status = job['status']
+        self.returncode = proc.returncode
+        self.create_time = job.get('create_time')
+        self.completion_time = job.get('completion_time')
+        self.cpu = job['cpu_user'] + job['cpu_sys'] if 'cpu_user' in job else None
+
+
+class JobRegistry:
+    """Live and recently finished jobs, indexed by job id and pid.
+
+    Iterating yields a snapshot of the jobs still in the table in launch
+    order, so schedulers can walk it while the shell keeps adding jobs.
+    """
+    def __init__(self, keep_finished=100, archive_limit=1000):
+        self.lock = threading.Lock()
+        self.by_id = {} # job id -> job dict, in launch order
+        self.by_pid = {} # pid -> job dict
+        self.finished = deque() # ids of finished jobs still in the table, oldest first
+        self.archive = deque(maxlen=archive_limit) # JobRecords of the newest archived jobs
+        self.archived = {} # status -> number of jobs ever archived with it
+        self.keep_finished = keep_finished
+        self.next_id = 1
+        self.launched = 0
+
+    def add(self, proc, cmd, **fields):
+        """Register a newly started process and return its job dict.
+
+        Every job starts with the timing fields the schedulers update
+        (create_time, first_scheduled, run_time, completion_time); fields
+        adds to or overrides them.
+        """
+        with self.lock:
+            job = {'id': self.next_id, 'proc': proc, 'cmd': cmd, 'status': 'Running',
+                   'create_time': time.time(), 'first_scheduled': None,
+                   'run_time': 0.0, 'completion_time': None, **fields}
+            self.by_id[job['id']] = job
+            self.by_pid[proc.pid] = job
+            self.next_id += 1
+            self.launched += 1
+        return job
+
+    def get(self, jid):
+        return self.by_id.get(jid)
+
+    def find_pid(self, pid):
+        return self.by_pid.get(pid)
+
+    def is_finished(self, job):
+        """True once finish() has recorded job's exit."""
+        return job.get('finished_at') is not None
+
+    def set_status(self, job, status):
+        """Change a live job's status and return True; finished jobs keep
+        their final status and return False."""
+        with self.lock:
+            if job.get('finished_at') is not None:
+                return False
+            job['status'] = status
+            return True
+
+    def finish(self, job):
+        """Record that job's process has exited and been reaped.
+
+        A job that was killed stays 'Killed'; otherwise the status becomes
+        'Done' or 'Exit <code>'. Archives the oldest finished jobs beyond
+        keep_finished. Calling it again for the same job does nothing.
+        """
+        code = job['proc'].returncode
+        with self.lock:
+            if job['id'] not in self.by_id or job.get('finished_at') is not None:
+                return
+            if job['status'] != 'Killed':
+                job['status'] = 'Done' if code == 0 else f'Exit {code}'
+            job['finished_at'] = time.time()
+            self.finished.append(job['id'])
+            while len(self.finished) > self.keep_finished:
+                self._archive(self.by_id[self.finished.popleft()])
+
+    def _archive(self, job):
+        del self.by_id[job['id']]
+        if self.by_pid.get(job['proc'].pid) is job: ## the pid may already belong to a newer job
+            del self.by_pid[job['proc'].pid]
+        self.archive.append(JobRecord(job))
+        self.archived[job['status']] = self.archived.get(job['status'], 0) + 1
+
+    def running(self):
+        """Number of jobs whose process has not been reaped yet."""
+        with self.lock:
+            return len(self.by_id) - len(self.finished)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.by_id.values()))
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __bool__(self):
+        return bool(self.by_id)
+
+    def summary(self):
+        total = sum(self.archived.values())
+        if not total:
+            return ""
+        counts = ', '.join(f"{n} {status}" for status, n in sorted(self.archived.items()))
+        return f"{total} older jobs archived ({counts})"
@@ -1,80 +1,701 @@
+import random
+import threading
 import time
-from collections import deque, OrderedDict
+from array import array
+
+from page_replacement import ReplacementPolicy, make_policy
+from paging import RadixPageTable, TLB
+import memstats
+from memstats import RateSeries
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 class PageFault(Exception):
     pass
 
+NIL = -1
+
 class MemoryManager:
-    def __init__(self, total_frames, algorithm='FIFO'):
+    """Paged memory over a fixed frame pool with a pluggable replacement policy.
+
+    Frame ownership lives in flat frame_pid / frame_page arrays indexed by
+    frame number and free frames in an array used as a stack. The replacement
+    policy (see page_replacement) is chosen by name or passed in as an
+    instance, and its hooks are bound once here so the access path makes a
+    single call per hit or fault without checking the algorithm.
+
+    Translation can optionally be modelled: levels > 1 gives every process a
+    RadixPageTable with that many levels instead of a flat dict, and
+    tlb_entries > 0 puts a TLB (tlb_ways per set, 0 = fully associative,
+    LRU or RANDOM eviction) in front of the page tables. Every lookup that
+    misses the TLB is counted as a page walk of `levels` memory references.
+
+    allocation selects global or local replacement. 'GLOBAL' evicts from any
+    process. 'WS' and 'PFF' give each process its own policy instance and a
+    frame quota, and a process at its quota replaces only its own pages.
+    Every `window` references of a process its quota is reset to its working
+    set (distinct pages referenced in the window) under 'WS', or grown or
+    shrunk when its fault rate is above pff_high or below pff_low under
+    'PFF'. A process faulting above pff_high while held below its quota, with
+    the quotas oversubscribing memory, is reported as thrashing through
+    thrash_handler(pid, thrashing) so the scheduler can suspend or
+    deprioritize it, and again once it recovers.
+
+    Counters (references, hits, faults, evictions caused and suffered) are
+    kept as they happen, globally and per pid, so stats() costs O(pids)
+    however many pages are resident. Every sample_every references the
+    fault rate of the whole manager and of each pid is appended to a
+    RateSeries ring buffer of `history` samples (see memstats).
+    """
+    def __init__(self, total_frames, algorithm='FIFO', levels=1, tlb_entries=0, tlb_ways=0, tlb_policy='LRU',
+                 allocation='GLOBAL', window=1000, pff_low=0.01, pff_high=0.1, sample_every=1000, history=1024):
+        if total_frames < 1:
+            raise ValueError("need at least one frame")
         self.total_frames = total_frames
-        self.algorithm = algorithm.upper()
-        self.frames = {}
-        self.free_frames = list(range(total_frames))
+        self.levels = levels
+        self.tlb = TLB(tlb_entries, tlb_ways, tlb_policy) if tlb_entries else None
+        self.walks = 0
+        if isinstance(algorithm, ReplacementPolicy):
+            self.policy = algorithm
+        else:
+            self.policy = make_policy(algorithm, total_frames)
+        self.algorithm = self.policy.name
+        self.allocation = allocation.upper()
+        if self.allocation == 'GLOBAL':
+            self.on_hit = self.policy.on_hit
+            self._allocate = self._allocate_global
+            self._on_insert = self.policy.on_insert
+        elif self.allocation in ('WS', 'PFF'):
+            if isinstance(algorithm, ReplacementPolicy):
+                raise ValueError("local allocation needs an algorithm name, not a policy instance")
+            self.window = window
+            self.pff_low = pff_low
+            self.pff_high = pff_high
+            self.policies = {} # pid -> its own replacement policy
+            self.quota = {}
+            self.vtime = {} # pid -> references made (per-process virtual time)
+            self.window_faults = {}
+            self.window_pages = {} # pid -> distinct pages referenced in the current window
+            self.thrashing = set()
+            self.thrash_handler = None
+            self.on_hit = self._hit_local
+            self._allocate = self._allocate_local
+            self._on_insert = self._insert_local
+        else:
+            raise ValueError(f"Unknown allocation: {allocation}")
+        self.frame_pid = array('q', [NIL]) * total_frames
+        self.frame_page = array('q', [0]) * total_frames
+        self.free = array('i', range(total_frames - 1, -1, -1)) # popped from the end, so frame 0 goes first
         self.page_table = {}
-        self.load_order = deque()
-        self.usage_order = OrderedDict()
         self.page_faults = {}
+        self.hits = {}
+        self.evictions_caused = {} # pid -> pages it evicted to make room
+        self.evictions_suffered = {} # pid -> its pages evicted by anyone
+        self.refs = 0
+        self.faults = 0
+        self.evictions = 0
+        self.sample_every = sample_every
+        self.next_sample = sample_every
+        self.history = history
+        self.series = {'all': RateSeries(history)}
+
+    def frame_owner(self, frame):
+        """Return the (pid, page) held in frame, or None if it is free."""
+        pid = self.frame_pid[frame]
+        return None if pid == NIL else (pid, self.frame_page[frame])
 
     def add_process(self, pid):
-        self.page_table[pid] = {}
+        self.page_table[pid] = {} if self.levels <= 1 else RadixPageTable(self.levels)
         self.page_faults[pid] = 0
+        self.hits[pid] = 0
+        self.evictions_caused[pid] = 0
+        self.evictions_suffered[pid] = 0
+        self.series[pid] = RateSeries(self.history)
+        if self.allocation != 'GLOBAL':
+            self.policies[pid] = make_policy(self.algorithm, self.total_frames)
+            self.quota[pid] = max(1, self.total_frames // len(self.page_table)) # a guess until its first window ends
+            self.vtime[pid] = 0
+            self.window_faults[pid] = 0
+            self.window_pages[pid] = set()
 
     def remove_process(self, pid):
-        for page, frame in list(self.page_table[pid].items()):
-            self.free_frames.append(frame)
-            self.frames.pop(frame, None)
-            try:
-                self.load_order.remove((pid, page))
-            except ValueError:
-                pass
-            self.usage_order.pop((pid, page), None)
-        self.page_table.pop(pid)
-        self.page_faults.pop(pid)
+        policy = self.policy if self.allocation == 'GLOBAL' else self.policies.pop(pid)
+        for frame in self.page_table.pop(pid).values():
+            policy.on_remove(frame)
+            self._release(frame)
+        for table in (self.page_faults, self.hits, self.evictions_caused, self.evictions_suffered, self.series):
+            table.pop(pid)
+        if self.tlb is not None:
+            self.tlb.flush(pid)
+        if self.allocation != 'GLOBAL':
+            for table in (self.quota, self.vtime, self.window_faults, self.window_pages):
+                table.pop(pid)
+            self._set_thrashing(pid, False)
 
-    def access_page(self, pid, page):
+    def _release(self, frame):
+        """Return an unmapped frame to the free pool."""
+        self.frame_pid[frame] = NIL
+        self.free.append(frame)
+
+    def _evict(self, frame, pid):
+        """Unmap whatever page frame holds so pid can reuse it."""
+        victim_pid, victim_page = self.frame_pid[frame], self.frame_page[frame]
+        del self.page_table[victim_pid][victim_page]
+        self.evictions += 1
+        self.evictions_caused[pid] += 1
+        self.evictions_suffered[victim_pid] += 1
+        if self.tlb is not None:
+            self.tlb.invalidate(victim_pid, victim_page)
+
+    def _allocate_global(self, pid, page):
+        policy = self.policy
+        policy.on_miss(pid, page)
+        if self.free:
+            return self.free.pop()
+        frame = policy.choose_victim(pid, page)
+        self._evict(frame, pid)
+        return frame
+
+    def _tick(self, pid, page):
+        """Advance pid's virtual time; adjust its quota at each window end."""
+        self.window_pages[pid].add(page)
+        t = self.vtime[pid] = self.vtime[pid] + 1
+        if t % self.window == 0:
+            self._adjust_quota(pid)
+
+    def _adjust_quota(self, pid):
+        rate = self.window_faults[pid] / self.window
+        rss = len(self.page_table[pid])
+        quota = held = self.quota[pid]
+        if self.allocation == 'WS':
+            quota = len(self.window_pages[pid])
+        elif rate > self.pff_high:
+            quota = max(quota, rss + max(1, rss // 4))
+        elif rate < self.pff_low:
+            quota = min(quota, rss) - max(1, rss // 8)
+        self.quota[pid] = quota = min(self.total_frames, max(1, quota))
+        self.window_faults[pid] = 0
+        self.window_pages[pid] = set()
+
+        # Thrashing: faulting hard while held below a quota memory cannot cover
+        starved = rss < min(held, quota) and sum(self.quota.values()) > self.total_frames
+        if rate > self.pff_high and starved:
+            self._set_thrashing(pid, True)
+        elif rate <= self.pff_high / 2 or not starved:
+            self._set_thrashing(pid, False)
+
+    def _set_thrashing(self, pid, thrashing):
+        if thrashing == (pid in self.thrashing):
+            return
+        if thrashing:
+            self.thrashing.add(pid)
+        else:
+            self.thrashing.discard(pid)
+        if self.thrash_handler is not None:
+            self.thrash_handler(pid, thrashing)
+
+    def _hit_local(self, frame):
+        pid = self.frame_pid[frame]
+        self.policies[pid].on_hit(frame)
+        self._tick(pid, self.frame_page[frame])
+
+    def _allocate_local(self, pid, page):
+        self._tick(pid, page)
+        self.window_faults[pid] += 1
+        policy = self.policies[pid]
+        policy.on_miss(pid, page)
+        rss = len(self.page_table[pid])
+        if rss and rss >= self.quota[pid]: # at quota: replace one of our own pages
+            frame = policy.choose_victim(pid, page)
+        elif self.free:
+            return self.free.pop()
+        else: # take a frame from whoever is furthest over its quota
+            pt, quota = self.page_table, self.quota
+            victim = max(pt, key=lambda p: len(pt[p]) - quota[p])
+            if len(pt[victim]) <= quota[victim]:
+                # Quotas oversubscribe memory: only a process above its fair
+                # share gives up frames, otherwise we replace our own page
+                largest = max(pt, key=lambda p: len(pt[p]))
+                fair = max(rss, self.total_frames // len(pt))
+                victim = largest if not rss or len(pt[largest]) > fair else pid
+            frame = self.policies[victim].choose_victim(pid, page)
+        self._evict(frame, pid)
+        return frame
+
+    def _insert_local(self, frame, pid, page):
+        self.policies[pid].on_insert(frame, pid, page)
+
+    def _access(self, pid, page):
+        """Reference one page; return True on a hit, False after handling a fault."""
+        self.refs += 1
+        if self.refs >= self.next_sample:
+            self._sample()
         pt = self.page_table[pid]
+        tlb = self.tlb
+        frame = tlb.lookup(pid, page) if tlb is not None else None
+        if frame is None:
+            self.walks += 1
+            frame = pt.get(page)
+            if frame is not None and tlb is not None:
+                tlb.insert(pid, page, frame)
         # Hit
-        if page in pt:
-            frame = pt[page]
-            if self.algorithm == 'LRU':
-                # move to end
-                self.usage_order.pop((pid, page), None)
-                self.usage_order[(pid, page)] = frame
+        if frame is not None:
+            self.hits[pid] += 1
+            self.on_hit(frame)
             return True
 
         # Fault
         self.page_faults[pid] += 1
+        self.faults += 1
         # Allocate frame or replace
-        if self.free_frames:
-            frame = self.free_frames.pop(0)
-        else:
-            # choose victim
-            if self.algorithm == 'FIFO':
-                victim = self.load_order.popleft()
-            elif self.algorithm == 'LRU':
-                victim = next(iter(self.usage_order))
-            else:
-                raise ValueError("Unknown algorithm")
-            victim_pid, victim_page = victim
-            frame = self.page_table[victim_pid].pop(victim_page)
-            self.frames.pop(frame)
-            # remove from trackers
-            if self.algorithm == 'FIFO':
-                pass  # already popped
-            else:
-                self.usage_order.pop(victim)
+        frame = self._allocate(pid, page)
 
         # load new page
-        self.frames[frame] = (pid, page)
-        self.page_table[pid][page] = frame
-        self.load_order.append((pid, page))
-        self.usage_order[(pid, page)] = frame
-        raise PageFault(f"PID {pid} page {page} fault -> loaded in frame {frame}")
+        self.frame_pid[frame] = pid
+        self.frame_page[frame] = page
+        pt[page] = frame
+        if tlb is not None:
+            tlb.insert(pid, page, frame)
+        self._on_insert(frame, pid, page)
+        return False
+
+    def frame_of(self, pid, page):
+        """Frame holding pid's page, or None if it is not resident."""
+        return self.page_table[pid].get(page)
+
+    def access_page(self, pid, page):
+        if self._access(pid, page):
+            return True
+        raise PageFault(f"PID {pid} page {page} fault -> loaded in frame {self.frame_of(pid, page)}")
+
+    def access_many(self, pid, pages):
+        """Replay a sequence of page references for pid without raising.
+
+        pages may be any iterable of ints or a NumPy integer array. Returns
+        (hits, faults): a per-reference hit vector (1 = hit, 0 = fault) as a
+        bytearray, or a NumPy bool array when pages is one, and the number of
+        faults in this batch. page_faults[pid] is updated as usual.
+        """
+        is_numpy = numpy is not None and isinstance(pages, numpy.ndarray)
+        if is_numpy:
+            pages = pages.tolist() # plain ints iterate much faster than numpy scalars
+        access = self._access
+        hits = bytearray(access(pid, page) for page in pages)
+        faults = len(hits) - sum(hits)
+        if is_numpy:
+            hits = numpy.frombuffer(hits, dtype=bool)
+        return hits, faults
+
+    def replay(self, trace):
+        """Run a whole trace of (pid, page) pairs, or bare pages for pid 0.
+
+        Processes are added on first reference. Returns the number of faults.
+        """
+        access, pt = self._access, self.page_table
+        faults = 0
+        for ref in trace:
+            pid, page = ref if isinstance(ref, tuple) else (0, ref)
+            if pid not in pt:
+                self.add_process(pid)
+            if not access(pid, page):
+                faults += 1
+        return faults
 
-    def stats(self):
+    @classmethod
+    def optimal(cls, total_frames, trace):
+        """A manager using Belady's OPT for this trace; drive it with replay(trace)."""
+        return cls(total_frames, make_policy('OPT', total_frames, trace))
+
+    def _sample(self):
+        self.next_sample += self.sample_every
+        series = self.series
+        series['all'].record(self.refs, self.faults, self.refs - self.faults, self.total_frames - len(self.free))
+        for pid, pt in self.page_table.items():
+            series[pid].record(self.refs, self.page_faults[pid], self.hits[pid], len(pt))
+
+    def export_series(self, path):
+        """Write the fault-rate history as CSV, or JSON if path ends in .json."""
+        memstats.export(path, self.series)
+
+    def stats(self, pages=False):
+        """Summarise the counters; pages=True also lists every resident page."""
         lines = []
         lines.append(f"Total frames: {self.total_frames}")
         lines.append(f"Algorithm: {self.algorithm}")
+        ratio = self.faults / self.refs if self.refs else 0.0
+        lines.append(f"References: {self.refs}, hits {self.refs - self.faults}, faults {self.faults} "
+                     f"(fault ratio {ratio:.3f}), evictions {self.evictions}")
+        lines.append(f"Resident: {self.total_frames - len(self.free)} frames, {len(self.free)} free")
+        if self.tlb is not None:
+            lookups = self.tlb.hits + self.tlb.misses
+            ratio = self.tlb.hits / lookups if lookups else 0.0
+            lines.append(f"TLB: {self.tlb.hits} hits, {self.tlb.misses} misses, hit ratio {ratio:.3f}")
+        lines.append(f"Page walks: {self.walks} ({self.walks * self.levels} page-table references, {self.levels} levels)")
+        if self.allocation != 'GLOBAL':
+            lines.append(f"Allocation: {self.allocation} (window {self.window} refs), "
+                         f"quotas total {sum(self.quota.values())}")
         for pid, faults in self.page_faults.items():
-            lines.append(f"PID {pid}: {faults} page faults, pages in memory: {list(self.page_table[pid].keys())}")
-        return "\n".join(lines)
\ No newline at end of file
+            lines.append(f"PID {pid}: {self.hits[pid]} hits, {faults} page faults, resident {len(self.page_table[pid])}, "
+                         f"evictions caused {self.evictions_caused[pid]}, suffered {self.evictions_suffered[pid]}")
+            if pages:
+                lines.append(f"  pages in memory: {list(self.page_table[pid].keys())}")
+            if self.allocation != 'GLOBAL':
+                state = ", THRASHING" if pid in self.thrashing else ""
+                lines.append(f"  quota {self.quota[pid]} frames{state}")
+        return "\n".join(lines)
+
+
+class _Shard(MemoryManager):
+    """One lock stripe of a ShardedMemoryManager.
+
+    Holds the pids that hash to it, its own replacement policy, TLB and free
+    pool. Frames move between shards, so the free pool holds global frame
+    numbers, but a mapped frame is given a local slot number in this shard
+    and everything inherited from MemoryManager (page tables, TLB, frame_pid
+    and frame_page, the policy) works on slots. The slot arrays start at the
+    shard's share of the pool and double when it maps more frames than that,
+    so all shards together stay close to the size of one MemoryManager.
+    total_frames is the shard's current slot capacity.
+    """
+    def __init__(self, owner, frames, *args):
+        super().__init__(len(frames), *args)
+        self.owner = owner
+        self.lock = threading.Lock()
+        self.free = array('i', reversed(frames))
+        self.slot_frame = array('i', [NIL]) * len(frames) # slot -> global frame, NIL when unused
+        self.spare = array('i', range(len(frames) - 1, -1, -1)) # unused slots
+        self.resident = 0 # frames mapped by this shard's pids
+        self.steals = 0 # frames taken from other shards
+        self.pids = set()
+
+    def _grow(self):
+        old = self.total_frames
+        new = min(self.owner.total_frames, 2 * old)
+        extra = new - old
+        self.frame_pid.extend(array('q', [NIL]) * extra)
+        self.frame_page.extend(array('q', [0]) * extra)
+        self.slot_frame.extend(array('i', [NIL]) * extra)
+        self.spare.extend(range(new - 1, old - 1, -1))
+        self.policy.grow(new)
+        self.total_frames = new
+
+    def _bind(self, frame):
+        """Give global frame a slot and return the slot."""
+        if not self.spare:
+            self._grow()
+        slot = self.spare.pop()
+        self.slot_frame[slot] = frame
+        return slot
+
+    def _unbind(self, slot):
+        """Free an unmapped slot and return the global frame it held."""
+        frame = self.slot_frame[slot]
+        self.slot_frame[slot] = NIL
+        self.frame_pid[slot] = NIL
+        self.spare.append(slot)
+        return frame
+
+    def _release(self, slot):
+        self.free.append(self._unbind(slot))
+
+    def frame_owner(self, frame):
+        try:
+            slot = self.slot_frame.index(frame)
+        except ValueError:
+            return None
+        return super().frame_owner(slot)
+
+    def frame_of(self, pid, page):
+        slot = self.page_table[pid].get(page)
+        return None if slot is None else self.slot_frame[slot]
+
+    def add_process(self, pid):
+        super().add_process(pid)
+        self.pids.add(pid)
+
+    def remove_process(self, pid):
+        self.resident -= len(self.page_table[pid])
+        super().remove_process(pid)
+        self.pids.discard(pid)
+
+    def _sample(self):
+        self.next_sample += self.sample_every
+        series = self.series
+        series['all'].record(self.refs, self.faults, self.refs - self.faults, self.resident)
+        for pid in self.pids:
+            series[pid].record(self.refs, self.page_faults[pid], self.hits[pid], len(self.page_table[pid]))
+
+    def _allocate_global(self, pid, page):
+        """Own free pool, then other shards' free pools, then own pages,
+        and only when this shard holds nothing, another shard's victim."""
+        policy = self.policy
+        policy.on_miss(pid, page)
+        if not self.free:
+            self.owner._refill(self)
+        if self.free:
+            self.resident += 1
+            return self._bind(self.free.pop())
+        if self.resident:
+            slot = policy.choose_victim(pid, page)
+            self._evict(slot, pid)
+            return slot
+        frame = self.owner._steal_victim(self, pid) # resident stays 0 while stealing, see _steal_victim
+        self.resident += 1
+        return self._bind(frame)
+
+
+class ShardedMemoryManager:
+    """Thread-safe MemoryManager striped by pid.
+
+    Every pid hashes to one of `shards` _Shard managers, each with its own
+    lock, policy and free-frame pool, so threads touching different shards
+    never contend and a hit holds only its own shard's lock. A shard whose
+    pool runs dry first takes a batch of up to `refill` free frames from
+    another shard, then replaces one of its own pages; only a shard holding
+    no frames at all evicts from another one, chosen by that shard's own
+    policy. Replacement is therefore per shard, not one global victim choice
+    across the whole pool (which would need every shard's lock on each
+    fault); with shards=1 it is exactly MemoryManager behind one lock.
+    Refills and the first attempt at a steal use non-blocking acquires, so a
+    busy shard is simply skipped; see _steal_victim for the blocking case.
+
+    The tlb_entries TLB entries are split between the shards (at least one
+    each), so the modelled TLB keeps its size however many shards there are.
+
+    Only global allocation is supported. page_table and the per-pid counter
+    dicts are shared by all shards, as in MemoryManager; each shard keeps
+    its own totals and fault-rate series.
+    """
+    def __init__(self, total_frames, algorithm='FIFO', shards=8, levels=1, tlb_entries=0, tlb_ways=0,
+                 tlb_policy='LRU', refill=32):
+        if total_frames < 1:
+            raise ValueError("need at least one frame")
+        if shards < 1 or shards > total_frames:
+            raise ValueError(f"need between 1 and {total_frames} shards")
+        self.total_frames = total_frames
+        self.levels = levels
+        self.refill = refill
+        self.steal_lock = threading.Lock() # one blocking steal at a time
+        self.page_table = {}
+        self.page_faults = {}
+        self.hits = {}
+        self.evictions_caused = {}
+        self.evictions_suffered = {}
+        self.tlb_entries = tlb_entries
+        self.shards = []
+        for i in range(shards):
+            frames = range(i * total_frames // shards, (i + 1) * total_frames // shards)
+            entries = tlb_entries * (i + 1) // shards - tlb_entries * i // shards if tlb_entries else 0
+            shard = _Shard(self, frames, algorithm, levels, max(1, entries) if tlb_entries else 0,
+                           tlb_ways, tlb_policy)
+            shard.page_table = self.page_table # each pid is only ever touched under its own shard's lock
+            shard.page_faults = self.page_faults
+            shard.hits = self.hits
+            shard.evictions_caused = self.evictions_caused
+            shard.evictions_suffered = self.evictions_suffered
+            self.shards.append(shard)
+        self.algorithm = self.shards[0].algorithm
+
+    def shard(self, pid):
+        return self.shards[pid % len(self.shards)]
+
+    def frame_owner(self, frame):
+        for shard in self.shards:
+            owner = shard.frame_owner(frame)
+            if owner is not None:
+                return owner
+        return None
+
+    def add_process(self, pid):
+        shard = self.shard(pid)
+        with shard.lock:
+            shard.add_process(pid)
+
+    def remove_process(self, pid):
+        shard = self.shard(pid)
+        with shard.lock:
+            shard.remove_process(pid)
+
+    def _refill(self, shard):
+        """Move a batch of free frames into shard, whose lock the caller holds."""
+        shards = self.shards
+        start = shards.index(shard)
+        for i in range(1, len(shards)):
+            other = shards[(start + i) % len(shards)]
+            if not other.free or not other.lock.acquire(blocking=False):
+                continue
+            try:
+                n = min(self.refill, (len(other.free) + 1) // 2)
+                if n:
+                    shard.free.extend(other.free[-n:])
+                    del other.free[-n:]
+            finally:
+                other.lock.release()
+            if shard.free:
+                shard.steals += n
+                return
+
+    def _take(self, shard, other, pid):
+        """Move one frame from other (whose lock the caller holds) to shard."""
+        if other.free:
+            frame = other.free.pop()
+        elif other.resident:
+            slot = other.policy.choose_donor() # other's own replacement state, not the faulting shard's
+            other._evict(slot, pid)
+            frame = other._unbind(slot)
+            other.resident -= 1
+        else:
+            return None
+        shard.steals += 1
+        return frame
+
+    def _steal_victim(self, shard, pid):
+        """Take a frame from some other shard for shard, which holds none.
+
+        One pass of non-blocking acquires first. If every candidate was busy,
+        the caller takes steal_lock and then blocks on candidates' locks. That
+        cannot deadlock: only shards holding frames are candidates, and a
+        thread holding such a shard's lock never waits for another lock,
+        while stealers (the only threads that wait) hold shards with no frames.
+        """
+        for other in self.shards:
+            if other is shard or not (other.resident or other.free) or not other.lock.acquire(blocking=False):
+                continue
+            try:
+                frame = self._take(shard, other, pid)
+            finally:
+                other.lock.release()
+            if frame is not None:
+                return frame
+        with self.steal_lock:
+            while True:
+                for other in self.shards:
+                    if other is shard or not (other.resident or other.free):
+                        continue
+                    with other.lock:
+                        frame = self._take(shard, other, pid)
+                    if frame is not None:
+                        return frame
+
+    def _access(self, pid, page):
+        shard = self.shards[pid % len(self.shards)]
+        with shard.lock:
+            return shard._access(pid, page)
+
+    def access_page(self, pid, page):
+        shard = self.shard(pid)
+        with shard.lock:
+            return shard.access_page(pid, page)
+
+    def frame_of(self, pid, page):
+        shard = self.shard(pid)
+        with shard.lock:
+            return shard.frame_of(pid, page)
+
+    def access_many(self, pid, pages):
+        """As MemoryManager.access_many, holding the shard lock once per batch."""
+        shard = self.shard(pid)
+        with shard.lock:
+            return shard.access_many(pid, pages)
+
+    def replay(self, trace):
+        access, pt = self._access, self.page_table
+        faults = 0
+        for ref in trace:
+            pid, page = ref if isinstance(ref, tuple) else (0, ref)
+            if pid not in pt:
+                self.add_process(pid)
+            if not access(pid, page):
+                faults += 1
+        return faults
+
+    @property
+    def series(self):
+        """Fault-rate series of every shard ('shard<i>') and every pid."""
+        merged = {}
+        for i, shard in enumerate(self.shards):
+            merged[f"shard{i}"] = shard.series['all']
+            merged.update((pid, s) for pid, s in shard.series.items() if pid != 'all')
+        return merged
+
+    def export_series(self, path):
+        memstats.export(path, self.series)
+
+    def stats(self, pages=False):
+        lines = [f"Total frames: {self.total_frames}",
+                 f"Algorithm: {self.algorithm}, {len(self.shards)} shards"]
+        tlb_hits = tlb_misses = walks = 0
+        for shard in self.shards:
+            with shard.lock:
+                walks += shard.walks
+                if shard.tlb is not None:
+                    tlb_hits += shard.tlb.hits
+                    tlb_misses += shard.tlb.misses
+        if self.tlb_entries:
+            lookups = tlb_hits + tlb_misses
+            ratio = tlb_hits / lookups if lookups else 0.0
+            lines.append(f"TLB: {tlb_hits} hits, {tlb_misses} misses, hit ratio {ratio:.3f}")
+        lines.append(f"Page walks: {walks} ({walks * self.levels} page-table references, {self.levels} levels)")
+        for i, shard in enumerate(self.shards):
+            with shard.lock:
+                lines.append(f"Shard {i}: {shard.refs} references, {shard.faults} faults, "
+                             f"{shard.evictions} evictions, {shard.resident} frames resident, "
+                             f"{len(shard.free)} free, {shard.steals} taken from other shards")
+                for pid in sorted(shard.pids):
+                    lines.append(f"PID {pid}: {self.hits[pid]} hits, {self.page_faults[pid]} page faults, "
+                                 f"resident {len(self.page_table[pid])}, evictions caused "
+                                 f"{self.evictions_caused[pid]}, suffered {self.evictions_suffered[pid]}")
+                    if pages:
+                        lines.append(f"  pages in memory: {list(self.page_table[pid].keys())}")
+        return "\n".join(lines)
+
+
+def benchmark(total_frames=4096, threads=(1, 2, 4, 8), shards=8, refs=200000, pages=256, algorithm='LRU'):
+    """Measure hit throughput of concurrent page references.
+
+    Each thread owns one pid and references `pages` pages (all resident after
+    warm-up, so this measures the hit path) `refs` times in total, split
+    evenly across threads. Runs a single-lock MemoryManager and a
+    ShardedMemoryManager for every thread count and returns
+    [(threads, locked_refs_per_sec, sharded_refs_per_sec)].
+    """
+    def run(mm, lock, nthreads):
+        per_thread = refs // nthreads
+        traces = []
+        for pid in range(nthreads):
+            mm.add_process(pid)
+            rng = random.Random(pid)
+            traces.append([rng.randrange(pages) for _ in range(per_thread)])
+            for page in range(pages):
+                mm._access(pid, page)
+        barrier = threading.Barrier(nthreads + 1)
+
+        def worker(pid, trace):
+            access = mm._access
+            barrier.wait()
+            if lock is None:
+                for page in trace:
+                    access(pid, page)
+            else:
+                for page in trace:
+                    with lock:
+                        access(pid, page)
+
+        workers = [threading.Thread(target=worker, args=(pid, traces[pid])) for pid in range(nthreads)]
+        for w in workers:
+            w.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for w in workers:
+            w.join()
+        return per_thread * nthreads / (time.perf_counter() - start)
+
+    results = []
+    for n in threads:
+        locked = run(MemoryManager(total_frames, algorithm), threading.Lock(), n)
+        sharded = run(ShardedMemoryManager(total_frames, algorithm, shards), None, n)
+        results.append((n, locked, sharded))
+    return results
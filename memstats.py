@@ -0,0 +1,81 @@
+import csv
+import json
+import time
+from array import array
+
+# Fault-rate time series for MemoryManager.
+# The manager keeps running counters and, every sample_every references,
+# appends one sample per series (the whole manager plus each live pid) to a
+# fixed-size ring buffer of typed arrays, so sampling never allocates and old
+# samples are overwritten. Series can be exported as CSV or JSON.
+
+
+class RateSeries:
+    """Ring buffer of (timestamp ns, reference clock, faults, hits, resident,
+    fault rate) samples, where faults and hits count the interval since the
+    previous sample and resident is the frame count at the sample."""
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.ts = array('q', [0]) * capacity
+        self.clock = array('q', [0]) * capacity
+        self.faults = array('q', [0]) * capacity
+        self.hits = array('q', [0]) * capacity
+        self.resident = array('q', [0]) * capacity
+        self.rate = array('d', [0.0]) * capacity
+        self.count = 0 # total samples ever recorded
+        self.last_faults = 0
+        self.last_hits = 0
+
+    def record(self, clock, faults, hits, resident):
+        """Append a sample from cumulative fault and hit counts."""
+        df, dh = faults - self.last_faults, hits - self.last_hits
+        self.last_faults, self.last_hits = faults, hits
+        i = self.count % self.capacity
+        self.ts[i] = time.monotonic_ns()
+        self.clock[i] = clock
+        self.faults[i] = df
+        self.hits[i] = dh
+        self.resident[i] = resident
+        self.rate[i] = df / (df + dh) if df + dh else 0.0
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def samples(self):
+        """Yield (ts_ns, clock, faults, hits, resident, rate) oldest first."""
+        n = len(self)
+        for k in range(self.count - n, self.count):
+            i = k % self.capacity
+            yield self.ts[i], self.clock[i], self.faults[i], self.hits[i], self.resident[i], self.rate[i]
+
+
+FIELDS = ['ts_ns', 'clock', 'faults', 'hits', 'resident', 'fault_rate']
+
+
+def write_csv(path, series):
+    """Write {name: RateSeries} as one CSV with a leading series column."""
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['series'] + FIELDS)
+        for name, s in series.items():
+            for sample in s.samples():
+                w.writerow([name, *sample])
+
+
+def to_json(series):
+    return {str(name): [dict(zip(FIELDS, sample)) for sample in s.samples()]
+            for name, s in series.items()}
+
+
+def write_json(path, series):
+    with open(path, 'w') as f:
+        json.dump(to_json(series), f)
+
+
+def export(path, series):
+    """Write series as JSON if path ends in .json, otherwise as CSV."""
+    if path.endswith('.json'):
+        write_json(path, series)
+    else:
+        write_csv(path, series)
@@ -0,0 +1,207 @@
+import mmap
+import os
+import struct
+import sys
+import time
+
+# Binary page-reference traces for MemoryManager.
+# A file is an 8-byte header (b'MTRC', version, format, 2 reserved bytes)
+# followed by records. FIXED records are 13 bytes: pid u32, page u64, op u8,
+# little endian. VARINT records are delta/varint compressed: one varint
+# holding zigzag(page - previous page) << 3 | op << 1 | pid_changed, then the
+# new pid as a varint when pid_changed is set. Replay maps the file and
+# decodes it chunk by chunk, so a trace is never loaded into a list.
+
+MAGIC = b'MTRC'
+VERSION = 1
+FIXED, VARINT = 0, 1
+READ, WRITE, FREE = 0, 1, 2 # FREE: the process exited, release its frames
+
+HEADER = struct.Struct('<4sBBxx')
+RECORD = struct.Struct('<IQB')
+
+
+def _zigzag(n):
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def _unzigzag(n):
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+def _varint(n, out):
+    while n > 0x7F:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+class TraceWriter:
+    def __init__(self, path, compressed=False):
+        self.format = VARINT if compressed else FIXED
+        self.f = open(path, 'wb')
+        self.f.write(HEADER.pack(MAGIC, VERSION, self.format))
+        self.buf = bytearray()
+        self.pid = None
+        self.page = 0
+        self.count = 0
+
+    def write(self, pid, page, op=READ):
+        if self.format == FIXED:
+            self.buf += RECORD.pack(pid, page, op)
+        else:
+            changed = pid != self.pid
+            _varint(_zigzag(page - self.page) << 3 | op << 1 | changed, self.buf)
+            if changed:
+                _varint(pid, self.buf)
+                self.pid = pid
+            self.page = page
+        self.count += 1
+        if len(self.buf) >= 1 << 20:
+            self.flush()
+
+    def write_many(self, records):
+        for rec in records:
+            self.write(*rec)
+
+    def flush(self):
+        self.f.write(self.buf)
+        self.buf.clear()
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    """Memory-maps a trace file and yields its records in chunks."""
+    def __init__(self, path):
+        self.path = path
+        self.map = None
+        self.f = open(path, 'rb')
+        try:
+            if os.fstat(self.f.fileno()).st_size < HEADER.size: ## also keeps mmap from seeing an empty file
+                raise ValueError(f"{path}: too short to be a memory trace")
+            self.map = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.format = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path}: not a version {VERSION} memory trace")
+            if self.format not in (FIXED, VARINT):
+                raise ValueError(f"{path}: unknown record format {self.format}")
+            if self.format == FIXED and (len(self.map) - HEADER.size) % RECORD.size:
+                raise ValueError(f"{path}: truncated final record")
+        except BaseException:
+            self.close()
+            raise
+
+    def __len__(self):
+        """Record count; only known without decoding for FIXED traces."""
+        if self.format != FIXED:
+            raise TypeError("record count of a compressed trace is unknown")
+        return (len(self.map) - HEADER.size) // RECORD.size
+
+    def chunks(self, records=1 << 16):
+        """Yield iterables of (pid, page, op) tuples, about records at a time."""
+        if self.format == FIXED:
+            step = records * RECORD.size
+            end = HEADER.size + len(self) * RECORD.size
+            for start in range(HEADER.size, end, step):
+                yield RECORD.iter_unpack(self.map[start:min(start + step, end)]) # copies just this chunk out of the mapping
+        else:
+            yield from self._varint_chunks(records)
+
+    def _varint_chunks(self, records):
+        data = self.map
+        pos, end = HEADER.size, len(data)
+        pid, page = 0, 0
+        while pos < end:
+            chunk = []
+            try:
+                while pos < end and len(chunk) < records:
+                    n = shift = 0
+                    while True:
+                        b = data[pos]
+                        pos += 1
+                        n |= (b & 0x7F) << shift
+                        shift += 7
+                        if b < 0x80:
+                            break
+                    if n & 1:
+                        pid = shift = 0
+                        while True:
+                            b = data[pos]
+                            pos += 1
+                            pid |= (b & 0x7F) << shift
+                            shift += 7
+                            if b < 0x80:
+                                break
+                    page += _unzigzag(n >> 3)
+                    chunk.append((pid, page, (n >> 1) & 3))
+            except IndexError: ## a varint ran past the end of the file
+                raise ValueError(f"{self.path}: truncated final record") from None
+            yield chunk
+
+    def records(self):
+        for chunk in self.chunks():
+            yield from chunk
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay(mm, path, chunk_records=1 << 16):
+    """Stream a trace file through a MemoryManager.
+
+    Unknown pids are added on first reference and FREE records remove the
+    process. Returns (references, faults, seconds).
+    """
+    refs = faults = 0
+    start = time.perf_counter()
+    access, pt = mm._access, mm.page_table
+    with TraceReader(path) as reader:
+        for chunk in reader.chunks(chunk_records):
+            for pid, page, op in chunk:
+                if op == FREE:
+                    if pid in pt:
+                        mm.remove_process(pid)
+                    continue
+                if pid not in pt:
+                    mm.add_process(pid)
+                refs += 1
+                if not access(pid, page):
+                    faults += 1
+    return refs, faults, time.perf_counter() - start
+
+
+def convert_text(src, dst, compressed=False):
+    """Convert a text trace ('pid page [op]' or 'page' per line) to binary."""
+    with open(src) as f, TraceWriter(dst, compressed) as w:
+        for line in f:
+            fields = [int(x) for x in line.split()]
+            if len(fields) == 1:
+                w.write(0, fields[0])
+            elif fields:
+                w.write(*fields[:3])
+        return w.count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print(f"Usage: {sys.argv[0]} <trace.txt> <trace.mtr> [--compressed]")
+        sys.exit(1)
+    n = convert_text(sys.argv[1], sys.argv[2], '--compressed' in sys.argv[3:])
+    print(f"Wrote {n} records to {sys.argv[2]}")
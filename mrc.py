@@ -0,0 +1,149 @@
+import csv
+from array import array
+
+import memtrace
+
+# Miss-ratio curves for LRU from a single pass over a page-reference trace.
+# Mattson's stack algorithm: a reference hits in an LRU memory of F frames
+# exactly when its stack distance (the number of distinct pages touched
+# since the previous reference to the same page) is below F. Distances are
+# counted with a Fenwick tree over access times, one mark per distinct page
+# at its latest access, so each reference costs O(log M) for M distinct
+# pages. The tree is renumbered whenever the clock runs past its capacity.
+
+
+class Fenwick:
+    def __init__(self, size):
+        self.size = size
+        self.tree = array('i', [0]) * (size + 1)
+
+    def add(self, i, delta):
+        tree, size = self.tree, self.size
+        while i <= size:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        tree, total = self.tree, 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+
+class StackDistance:
+    """Streams references and histograms their LRU stack distances.
+
+    hist[d] counts references with stack distance d (0 = the page was the
+    most recently used one); cold counts first references. With sample_rate
+    below 1 only pages whose hash falls in the sample are tracked
+    (SHARDS-style spatial sampling), and distances and counts are scaled back
+    up by 1 / sample_rate, so billions of references can be summarised with a
+    small fraction of the work.
+    """
+    def __init__(self, sample_rate=1.0, capacity=1 << 16):
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"sample rate must be in (0, 1], not {sample_rate}")
+        self.sample_rate = sample_rate
+        self.threshold = int(sample_rate * (1 << 24))
+        self.tree = Fenwick(capacity)
+        self.last = {} # page -> time of its latest reference
+        self.now = 0
+        self.hist = array('q')
+        self.cold = 0
+        self.refs = 0
+
+    def _sampled(self, key):
+        return ((hash(key) * 0x9E3779B1) >> 8) & 0xFFFFFF < self.threshold
+
+    def _compact(self):
+        """Renumber live pages 1..M in access order into a tree of size 2M+."""
+        order = sorted(self.last.items(), key=lambda kv: kv[1])
+        self.tree = Fenwick(max(2 * len(order), 1 << 16))
+        for t, (key, _) in enumerate(order, 1):
+            self.last[key] = t
+            self.tree.add(t, 1)
+        self.now = len(order)
+
+    def access(self, key):
+        self.refs += 1
+        if self.threshold < 1 << 24 and not self._sampled(key):
+            return
+        if self.now >= self.tree.size:
+            self._compact()
+        self.now += 1
+        t = self.now
+        prev = self.last.get(key)
+        if prev is None:
+            self.cold += 1
+        else:
+            tree = self.tree
+            distance = tree.prefix(t - 1) - tree.prefix(prev)
+            if self.threshold < 1 << 24:
+                distance = int(distance / self.sample_rate)
+            hist = self.hist
+            if distance >= len(hist):
+                hist.extend([0] * (distance + 1 - len(hist)))
+            hist[distance] += 1
+            tree.add(prev, -1)
+        self.tree.add(t, 1)
+        self.last[key] = t
+
+    def feed(self, keys):
+        access = self.access
+        for key in keys:
+            access(key)
+        return self
+
+    def curve(self, max_frames=None):
+        """Return an array where entry F-1 is the LRU fault count for F frames."""
+        scale = 1.0 / self.sample_rate
+        hist = self.hist
+        if max_frames is None:
+            max_frames = max(len(hist), 1)
+        misses = (self.cold + sum(hist)) * scale # every reference misses with no frames
+        faults = array('d')
+        for frames in range(1, max_frames + 1):
+            if frames - 1 < len(hist):
+                misses -= hist[frames - 1] * scale
+            faults.append(misses)
+        return faults
+
+
+def miss_ratio_curve(trace, max_frames=None, sample_rate=1.0):
+    """One-pass LRU fault counts for every memory size 1..max_frames.
+
+    trace is an iterable of page numbers or (pid, page) pairs. Returns
+    (faults, references) where faults[F - 1] is the number of faults with F
+    frames.
+    """
+    sd = StackDistance(sample_rate).feed(trace)
+    return sd.curve(max_frames), sd.refs
+
+
+def load_trace(path):
+    """Read a binary memtrace file, or a text trace with one 'pid page' pair
+    (or one page) per line."""
+    with open(path, 'rb') as f:
+        binary = f.read(len(memtrace.MAGIC)) == memtrace.MAGIC
+    if binary:
+        with memtrace.TraceReader(path) as reader:
+            for pid, page, op in reader.records():
+                if op != memtrace.FREE:
+                    yield pid, page
+        return
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 2:
+                yield int(fields[0]), int(fields[1])
+            elif fields:
+                yield int(fields[0])
+
+
+def write_curve(path, faults, refs):
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['frames', 'faults', 'miss_ratio'])
+        for frames, n in enumerate(faults, 1):
+            w.writerow([frames, round(n), n / refs if refs else 0.0])
@@ -0,0 +1,474 @@
+import heapq
+from array import array
+from collections import OrderedDict
+
+# Page-replacement policies for MemoryManager.
+# The manager tells a policy about every hit, insert and removal of a
+# resident frame, and asks it for a victim frame when memory is full:
+#   on_hit(frame)                 a resident frame was referenced
+#   on_miss(pid, page)            a fault is about to be handled
+#   choose_victim(pid, page)      pick and forget a resident frame to evict
+#   choose_donor()                the same outside any fault, to give a frame away
+#   on_insert(frame, pid, page)   (pid, page) was just loaded into frame
+#   on_remove(frame)              frame was freed by remove_process
+#   grow(nframes)                 frame numbers up to nframes may now be used
+# Policies keep their bookkeeping in flat arrays indexed by frame number.
+
+
+class FrameLists:
+    """Several intrusive doubly linked lists over the same frame numbers.
+
+    A frame is in at most one list at a time, so all lists share one pair of
+    prev/next arrays; list k uses index nframes + k as its sentinel.
+    """
+    def __init__(self, nframes, nlists=1):
+        self.nframes = nframes
+        size = nframes + nlists
+        self.prev = array('i', range(size))
+        self.next = array('i', range(size))
+        self.owner = array('b', [-1]) * nframes # list each frame is in, -1 for none
+        self.sizes = [0] * nlists
+
+    def grow(self, nframes):
+        """Make room for frame numbers up to nframes; the sentinels move up."""
+        old, extra = self.nframes, nframes - self.nframes
+        fresh = array('i', range(old, nframes))
+        for name in ('prev', 'next'):
+            links = array('i', (i if i < old else i + extra for i in getattr(self, name)))
+            setattr(self, name, links[:old] + fresh + links[old:])
+        self.owner.extend(array('b', [-1]) * extra)
+        self.nframes = nframes
+
+    def push_tail(self, lst, frame):
+        sentinel = self.nframes + lst
+        last = self.prev[sentinel]
+        self.prev[frame] = last
+        self.next[frame] = sentinel
+        self.next[last] = frame
+        self.prev[sentinel] = frame
+        self.owner[frame] = lst
+        self.sizes[lst] += 1
+
+    def unlink(self, frame):
+        lst = self.owner[frame]
+        if lst < 0:
+            return
+        p, n = self.prev[frame], self.next[frame]
+        self.next[p] = n
+        self.prev[n] = p
+        self.owner[frame] = -1
+        self.sizes[lst] -= 1
+
+    def head(self, lst):
+        """First (oldest) frame of list lst, or -1 if it is empty."""
+        frame = self.next[self.nframes + lst]
+        return -1 if frame >= self.nframes else frame
+
+    def pop_head(self, lst):
+        frame = self.head(lst)
+        if frame >= 0:
+            self.unlink(frame)
+        return frame
+
+    def move_to_tail(self, lst, frame):
+        if self.owner[frame] == lst and self.next[frame] == self.nframes + lst:
+            return
+        self.unlink(frame)
+        self.push_tail(lst, frame)
+
+
+class ReplacementPolicy:
+    name = None
+
+    def __init__(self, nframes):
+        self.nframes = nframes
+
+    def on_hit(self, frame):
+        pass
+
+    def on_miss(self, pid, page):
+        pass
+
+    def choose_victim(self, pid, page):
+        raise NotImplementedError
+
+    def grow(self, nframes):
+        self.nframes = nframes
+
+    def choose_donor(self):
+        """Pick and forget a resident frame that another memory takes over.
+        No fault of this memory is pending, so no on_miss precedes it."""
+        return self.choose_victim(None, None)
+
+    def on_insert(self, frame, pid, page):
+        raise NotImplementedError
+
+    def on_remove(self, frame):
+        raise NotImplementedError
+
+
+class FIFOPolicy(ReplacementPolicy):
+    name = 'FIFO'
+
+    def __init__(self, nframes):
+        super().__init__(nframes)
+        self.lists = FrameLists(nframes)
+
+    def choose_victim(self, pid, page):
+        return self.lists.pop_head(0)
+
+    def grow(self, nframes):
+        super().grow(nframes)
+        self.lists.grow(nframes)
+
+    def on_insert(self, frame, pid, page):
+        self.lists.push_tail(0, frame)
+
+    def on_remove(self, frame):
+        self.lists.unlink(frame)
+
+
+class LRUPolicy(FIFOPolicy):
+    name = 'LRU'
+
+    def on_hit(self, frame):
+        self.lists.move_to_tail(0, frame)
+
+
+class ClockPolicy(ReplacementPolicy):
+    """One reference bit per frame and a hand sweeping over frame numbers.
+    A hit only sets a bit, so nothing is reordered on the hit path."""
+    name = 'CLOCK'
+
+    def __init__(self, nframes):
+        super().__init__(nframes)
+        self.ref = bytearray(nframes)
+        self.resident = bytearray(nframes)
+        self.hand = 0
+
+    def on_hit(self, frame):
+        self.ref[frame] = 1
+
+    def grow(self, nframes):
+        self.ref.extend(bytes(nframes - self.nframes))
+        self.resident.extend(bytes(nframes - self.nframes))
+        super().grow(nframes)
+
+    def choose_victim(self, pid, page):
+        ref, resident, n = self.ref, self.resident, self.nframes
+        hand = self.hand
+        while True:
+            if resident[hand]:
+                if not ref[hand]:
+                    break
+                ref[hand] = 0
+            hand += 1
+            if hand == n:
+                hand = 0
+        self.hand = hand + 1 if hand + 1 < n else 0
+        resident[hand] = 0
+        return hand
+
+    def on_insert(self, frame, pid, page):
+        self.resident[frame] = 1
+        self.ref[frame] = 0
+
+    def on_remove(self, frame):
+        self.resident[frame] = 0
+        self.ref[frame] = 0
+
+
+class SecondChancePolicy(FIFOPolicy):
+    """FIFO order, but a referenced head is moved to the tail once instead of
+    being evicted."""
+    name = 'SC'
+
+    def __init__(self, nframes):
+        super().__init__(nframes)
+        self.ref = bytearray(nframes)
+
+    def on_hit(self, frame):
+        self.ref[frame] = 1
+
+    def grow(self, nframes):
+        self.ref.extend(bytes(nframes - self.nframes))
+        super().grow(nframes)
+
+    def choose_victim(self, pid, page):
+        lists, ref = self.lists, self.ref
+        while True:
+            frame = lists.pop_head(0)
+            if not ref[frame]:
+                return frame
+            ref[frame] = 0
+            lists.push_tail(0, frame)
+
+    def on_insert(self, frame, pid, page):
+        self.ref[frame] = 0
+        self.lists.push_tail(0, frame)
+
+
+class LFUPolicy(ReplacementPolicy):
+    """Least frequently used, oldest first among equal counts.
+
+    A heap of (count, seq, frame) entries; an entry is stale once its seq no
+    longer matches the frame's, and stale entries are dropped lazily or in a
+    rebuild when they outnumber the live ones.
+    """
+    name = 'LFU'
+
+    def __init__(self, nframes):
+        super().__init__(nframes)
+        self.count = array('q', [0]) * nframes
+        self.seq = array('q', [-1]) * nframes # -1 when not resident
+        self.heap = []
+        self.clock = 0
+
+    def _push(self, frame):
+        self.clock += 1
+        self.seq[frame] = self.clock
+        heapq.heappush(self.heap, (self.count[frame], self.clock, frame))
+        if len(self.heap) > 2 * self.nframes + 64:
+            self.heap = [e for e in self.heap if self.seq[e[2]] == e[1]]
+            heapq.heapify(self.heap)
+
+    def on_hit(self, frame):
+        self.count[frame] += 1
+        self._push(frame)
+
+    def grow(self, nframes):
+        self.count.extend(array('q', [0]) * (nframes - self.nframes))
+        self.seq.extend(array('q', [-1]) * (nframes - self.nframes))
+        super().grow(nframes)
+
+    def choose_victim(self, pid, page):
+        while True:
+            _, seq, frame = heapq.heappop(self.heap)
+            if self.seq[frame] == seq:
+                self.seq[frame] = -1
+                return frame
+
+    def on_insert(self, frame, pid, page):
+        self.count[frame] = 1
+        self._push(frame)
+
+    def on_remove(self, frame):
+        self.seq[frame] = -1
+
+
+class TwoQPolicy(ReplacementPolicy):
+    """2Q (Johnson & Shasha). New pages enter the A1in FIFO; pages evicted
+    from it are remembered in the A1out ghost list, and only a page that
+    faults again while remembered is promoted to the Am LRU list. One-time
+    scans therefore cannot flush the frequently used pages out of Am."""
+    name = '2Q'
+    A1IN, AM = 0, 1
+
+    def __init__(self, nframes, kin=0.25, kout=0.5):
+        super().__init__(nframes)
+        self.lists = FrameLists(nframes, 2)
+        self.kin_share = kin
+        self.kout_share = kout
+        self.kin = max(1, int(nframes * kin))
+        self.kout = max(1, int(nframes * kout))
+        self.ghosts = OrderedDict() # A1out: (pid, page) keys only
+        self.keys = [None] * nframes
+
+    def on_hit(self, frame):
+        if self.lists.owner[frame] == self.AM:
+            self.lists.move_to_tail(self.AM, frame)
+
+    def grow(self, nframes):
+        self.lists.grow(nframes)
+        self.keys.extend([None] * (nframes - self.nframes))
+        self.kin = max(1, int(nframes * self.kin_share))
+        self.kout = max(1, int(nframes * self.kout_share))
+        super().grow(nframes)
+
+    def choose_victim(self, pid, page):
+        lists = self.lists
+        if lists.sizes[self.A1IN] > self.kin or lists.sizes[self.AM] == 0:
+            frame = lists.pop_head(self.A1IN)
+            self.ghosts[self.keys[frame]] = None
+            if len(self.ghosts) > self.kout:
+                self.ghosts.popitem(last=False)
+        else:
+            frame = lists.pop_head(self.AM)
+        self.keys[frame] = None
+        return frame
+
+    def on_insert(self, frame, pid, page):
+        key = (pid, page)
+        self.keys[frame] = key
+        if key in self.ghosts: # faulted again while remembered, so it is hot
+            del self.ghosts[key]
+            self.lists.push_tail(self.AM, frame)
+        else:
+            self.lists.push_tail(self.A1IN, frame)
+
+    def on_remove(self, frame):
+        self.lists.unlink(frame)
+        self.keys[frame] = None
+
+
+class ARCPolicy(ReplacementPolicy):
+    """Adaptive Replacement Cache (Megiddo & Modha).
+
+    T1 holds pages seen once recently and T2 pages seen at least twice; B1 and
+    B2 remember keys recently evicted from each. A fault on a B1 ghost grows
+    the target size p of T1, a fault on a B2 ghost shrinks it, so the split
+    between recency and frequency adapts to the workload.
+    """
+    name = 'ARC'
+    T1, T2 = 0, 1
+
+    def __init__(self, nframes):
+        super().__init__(nframes)
+        self.lists = FrameLists(nframes, 2)
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+        self.p = 0.0
+        self.keys = [None] * nframes
+        self.target = self.T1 # list the page being faulted in goes to
+        self.in_b2 = False
+        self.drop_t1 = False # evict from T1 without remembering it
+
+    def on_hit(self, frame):
+        self.lists.move_to_tail(self.T2, frame)
+
+    def grow(self, nframes):
+        self.lists.grow(nframes)
+        self.keys.extend([None] * (nframes - self.nframes))
+        super().grow(nframes) # c, the cache size the adaptation works against, grows too
+
+    def on_miss(self, pid, page):
+        key = (pid, page)
+        c = self.nframes
+        t1 = self.lists.sizes[self.T1]
+        self.in_b2 = False
+        self.drop_t1 = False
+        if key in self.b1:
+            self.p = min(c, self.p + max(len(self.b2) / len(self.b1), 1))
+            del self.b1[key]
+            self.target = self.T2
+        elif key in self.b2:
+            self.p = max(0.0, self.p - max(len(self.b1) / len(self.b2), 1))
+            del self.b2[key]
+            self.in_b2 = True
+            self.target = self.T2
+        else:
+            self.target = self.T1
+            if t1 + len(self.b1) >= c:
+                if t1 < c:
+                    self.b1.popitem(last=False)
+                else:
+                    self.drop_t1 = True
+            elif t1 + self.lists.sizes[self.T2] + len(self.b1) + len(self.b2) >= 2 * c and self.b2:
+                self.b2.popitem(last=False)
+
+    def choose_victim(self, pid, page):
+        lists = self.lists
+        t1 = lists.sizes[self.T1]
+        if self.drop_t1:
+            frame = lists.pop_head(self.T1)
+        elif t1 and (t1 > self.p or (self.in_b2 and t1 == self.p)) or not lists.sizes[self.T2]:
+            frame = lists.pop_head(self.T1)
+            self.b1[self.keys[frame]] = None
+        else:
+            frame = lists.pop_head(self.T2)
+            self.b2[self.keys[frame]] = None
+        self.keys[frame] = None
+        return frame
+
+    def choose_donor(self):
+        self.in_b2 = self.drop_t1 = False ## flags left by our last fault do not apply: plain REPLACE
+        return self.choose_victim(None, None)
+
+    def on_insert(self, frame, pid, page):
+        self.keys[frame] = (pid, page)
+        self.lists.push_tail(self.target, frame)
+
+    def on_remove(self, frame):
+        self.lists.unlink(frame)
+        self.keys[frame] = None
+
+
+class OPTPolicy(ReplacementPolicy):
+    """Belady's optimal replacement, for offline comparison.
+
+    Needs the whole reference trace up front and must then be driven with
+    exactly that trace. One backward pass builds next_use[i], the position of
+    the next reference to the same page as reference i. Resident frames sit in
+    a max-heap keyed on their next use (stale entries skipped lazily), so the
+    victim - the page needed furthest in the future - costs O(log M).
+    """
+    name = 'OPT'
+
+    def __init__(self, nframes, trace):
+        super().__init__(nframes)
+        keys = [k if isinstance(k, tuple) else (0, k) for k in trace]
+        never = len(keys)
+        self.next_use = array('q', [never]) * len(keys)
+        seen = {}
+        for i in range(len(keys) - 1, -1, -1):
+            self.next_use[i] = seen.get(keys[i], never)
+            seen[keys[i]] = i
+        self.frame_next = array('q', [-1]) * nframes # -1 when not resident
+        self.heap = []
+        self.pos = 0 # index of the reference being handled
+
+    def _track(self, frame):
+        nxt = self.next_use[self.pos]
+        self.pos += 1
+        self.frame_next[frame] = nxt
+        heapq.heappush(self.heap, (-nxt, frame))
+        if len(self.heap) > 2 * self.nframes + 64:
+            self.heap = [e for e in self.heap if self.frame_next[e[1]] == -e[0]]
+            heapq.heapify(self.heap)
+
+    def on_hit(self, frame):
+        self._track(frame)
+
+    def grow(self, nframes):
+        self.frame_next.extend(array('q', [-1]) * (nframes - self.nframes))
+        super().grow(nframes)
+
+    def choose_victim(self, pid, page):
+        while True:
+            neg, frame = heapq.heappop(self.heap)
+            if self.frame_next[frame] == -neg:
+                self.frame_next[frame] = -1
+                return frame
+
+    def on_insert(self, frame, pid, page):
+        self._track(frame)
+
+    def on_remove(self, frame):
+        self.frame_next[frame] = -1
+
+
+POLICIES = {
+    'FIFO': FIFOPolicy,
+    'LRU': LRUPolicy,
+    'CLOCK': ClockPolicy,
+    'SC': SecondChancePolicy,
+    'SECOND_CHANCE': SecondChancePolicy,
+    'LFU': LFUPolicy,
+    '2Q': TwoQPolicy,
+    'ARC': ARCPolicy,
+}
+
+
+def make_policy(algorithm, nframes, trace=None):
+    """Build the policy named by algorithm (case-insensitive).
+
+    'OPT' also needs the reference trace it will be driven with.
+    """
+    if algorithm.upper() == 'OPT':
+        if trace is None:
+            raise ValueError("OPT needs the reference trace in advance")
+        return OPTPolicy(nframes, trace)
+    try:
+        return POLICIES[algorithm.upper()](nframes)
+    except KeyError:
+        raise ValueError(f"Unknown algorithm: {algorithm}") from None
@@ -0,0 +1,174 @@
+import random
+from array import array
+from collections import OrderedDict
+
+# Address-translation structures for MemoryManager: a multi-level radix page
+# table per process and a TLB in front of all of them.
+
+
+class RadixPageTable:
+    """Multi-level page table mapping page numbers to frames.
+
+    Like an x86 table, each level below the root resolves bits (default 9)
+    of the page number; the root is a dict keyed by all remaining high bits,
+    so any 64-bit page number fits. Interior levels are dicts holding only
+    the subtrees in use, and each leaf is a flat array of 2**bits frame
+    numbers (-1 = unmapped), so densely used regions cost 4 bytes per page
+    and empty leaves are freed. Supports the dict operations MemoryManager
+    and the shell use on a page table.
+    """
+    def __init__(self, levels=4, bits=9):
+        if levels < 2:
+            raise ValueError("a radix page table needs at least 2 levels")
+        self.levels = levels
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.root = {}
+        self.size = 0
+
+    def _path(self, page, create=False):
+        """Return the list of (node, key) pairs from root to leaf slot, or None."""
+        path = []
+        node = self.root
+        shift = self.bits * (self.levels - 1)
+        key = page >> shift
+        for depth in range(self.levels - 1):
+            path.append((node, key))
+            child = node.get(key)
+            if child is None:
+                if not create:
+                    return None
+                if depth == self.levels - 2:
+                    child = [0, array('i', [-1]) * (1 << self.bits)] # leaf: [mapped count, frames]
+                else:
+                    child = {}
+                node[key] = child
+            node = child
+            shift -= self.bits
+            key = (page >> shift) & self.mask
+        path.append((node, key))
+        return path
+
+    def get(self, page, default=None):
+        path = self._path(page)
+        if path is None:
+            return default
+        leaf, idx = path[-1]
+        frame = leaf[1][idx]
+        return default if frame < 0 else frame
+
+    def __getitem__(self, page):
+        frame = self.get(page)
+        if frame is None:
+            raise KeyError(page)
+        return frame
+
+    def __contains__(self, page):
+        return self.get(page) is not None
+
+    def __setitem__(self, page, frame):
+        leaf, idx = self._path(page, create=True)[-1]
+        if leaf[1][idx] < 0:
+            leaf[0] += 1
+            self.size += 1
+        leaf[1][idx] = frame
+
+    def pop(self, page, *default):
+        path = self._path(page)
+        frame = -1
+        if path is not None:
+            leaf, idx = path[-1]
+            frame = leaf[1][idx]
+        if frame < 0:
+            if default:
+                return default[0]
+            raise KeyError(page)
+        leaf[1][idx] = -1
+        leaf[0] -= 1
+        self.size -= 1
+        if leaf[0] == 0: # free the empty leaf and any interior nodes it empties
+            for node, key in reversed(path[:-1]):
+                del node[key]
+                if node:
+                    break
+        return frame
+
+    def __delitem__(self, page):
+        self.pop(page)
+
+    def __len__(self):
+        return self.size
+
+    def items(self):
+        def walk(node, depth, prefix):
+            if depth == self.levels - 1:
+                for idx, frame in enumerate(node[1]):
+                    if frame >= 0:
+                        yield prefix << self.bits | idx, frame
+                return
+            for key in sorted(node):
+                yield from walk(node[key], depth + 1, (prefix << self.bits | key) if depth else key)
+        return walk(self.root, 0, 0)
+
+    def keys(self):
+        return (page for page, _ in self.items())
+
+    def values(self):
+        return (frame for _, frame in self.items())
+
+    def __iter__(self):
+        return self.keys()
+
+
+class TLB:
+    """Translation lookaside buffer caching (pid, page) -> frame.
+
+    entries are split into sets of ways entries each, indexed by the low bits
+    of the page number; ways=0 (or ways >= entries) makes it fully
+    associative. Within a set the victim is the least recently used entry
+    or, with policy 'RANDOM', a random one. Entries are tagged with the pid,
+    so a context switch needs no flush; remove_process flushes one pid.
+    """
+    def __init__(self, entries, ways=0, policy='LRU', seed=None):
+        if ways <= 0 or ways > entries:
+            ways = entries
+        self.ways = ways
+        self.nsets = max(1, entries // ways)
+        self.sets = [OrderedDict() for _ in range(self.nsets)]
+        self.policy = policy.upper()
+        if self.policy not in ('LRU', 'RANDOM'):
+            raise ValueError(f"Unknown TLB policy: {policy}")
+        self.rng = random.Random(seed)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, pid, page):
+        s = self.sets[page % self.nsets]
+        frame = s.get((pid, page))
+        if frame is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.policy == 'LRU':
+            s.move_to_end((pid, page))
+        return frame
+
+    def insert(self, pid, page, frame):
+        s = self.sets[page % self.nsets]
+        if (pid, page) not in s and len(s) >= self.ways:
+            if self.policy == 'LRU':
+                s.popitem(last=False)
+            else:
+                del s[list(s)[self.rng.randrange(len(s))]]
+        s[(pid, page)] = frame
+
+    def invalidate(self, pid, page):
+        self.sets[page % self.nsets].pop((pid, page), None)
+
+    def flush(self, pid=None):
+        for s in self.sets:
+            if pid is None:
+                s.clear()
+            else:
+                for key in [k for k in s if k[0] == pid]:
+                    del s[key]
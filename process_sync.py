@@ -1,5 +1,12 @@
+import multiprocessing
+import os
+import random
+import struct
 import threading
 import time
+from array import array
+from contextlib import contextmanager
+from multiprocessing import shared_memory
 from queue import Queue
 
 # Producer-Consumer
@@ -27,22 +34,721 @@ def producer_consumer(buffer_size=5, n_items=20):
     t1.join(); t2.join()
 
 # Dining Philosophers
+# Each strategy is a pair of pickup(i) / putdown(i) functions over n forks,
+# fork i sitting between philosophers i and i + 1. Philosophers record how
+# long every pickup took, so strategies can be compared on throughput, wait
+# times and fairness with hundreds of philosophers.
 
-def dining_philosophers(n=5, eat_limit=3):
+def _ordered_forks(n):
+    """Resource ordering: always take the lower-numbered fork first."""
     forks = [threading.Lock() for _ in range(n)]
-    
+
+    def pickup(i):
+        a, b = sorted((i, (i + 1) % n))
+        forks[a].acquire()
+        forks[b].acquire()
+
+    def putdown(i):
+        forks[i].release()
+        forks[(i + 1) % n].release()
+    return pickup, putdown
+
+
+def _waiter_forks(n):
+    """Arbitrator: a waiter seats at most n - 1 philosophers at the forks."""
+    forks = [threading.Lock() for _ in range(n)]
+    waiter = threading.Semaphore(n - 1)
+
+    def pickup(i):
+        waiter.acquire()
+        forks[i].acquire()
+        forks[(i + 1) % n].acquire()
+
+    def putdown(i):
+        forks[i].release()
+        forks[(i + 1) % n].release()
+        waiter.release()
+    return pickup, putdown
+
+
+def _trylock_forks(n, base_backoff=1e-5, max_backoff=1e-3):
+    """Take the left fork, try the right; on failure drop both and back off
+    for a random, exponentially growing time."""
+    forks = [threading.Lock() for _ in range(n)]
+    rng = random.Random()
+
+    def pickup(i):
+        left, right = forks[i], forks[(i + 1) % n]
+        backoff = base_backoff
+        while True:
+            left.acquire()
+            if right.acquire(blocking=False):
+                return
+            left.release()
+            time.sleep(rng.uniform(0, backoff))
+            backoff = min(backoff * 2, max_backoff)
+
+    def putdown(i):
+        forks[i].release()
+        forks[(i + 1) % n].release()
+    return pickup, putdown
+
+
+class _Fork:
+    __slots__ = ('cond', 'holder', 'dirty')
+
+    def __init__(self, holder):
+        self.cond = threading.Condition(threading.Lock())
+        self.holder = holder
+        self.dirty = True
+
+
+def _chandy_misra_forks(n):
+    """Chandy-Misra: every fork has a holder and is clean or dirty. A hungry
+    philosopher takes a requested fork from a neighbour who holds it dirty
+    and is not eating, and it becomes clean; a clean fork is kept until its
+    holder has eaten. Forks start dirty with the lower-numbered neighbour, so
+    the precedence graph is acyclic and nobody starves."""
+    forks = [_Fork(min(i, (i + 1) % n)) for i in range(n)]
+    eating = [False] * n
+
+    def mine(i):
+        return sorted((forks[i], forks[(i + 1) % n]), key=id)
+
+    def pickup(i):
+        while True:
+            for f in mine(i):
+                with f.cond:
+                    while f.holder != i:
+                        if f.dirty and not eating[f.holder]:
+                            f.holder, f.dirty = i, False
+                        else:
+                            f.cond.wait()
+            # Start eating only while holding both; a dirty one may have been
+            # taken back while we waited for the other.
+            a, b = mine(i)
+            with a.cond, b.cond:
+                if a.holder == i and b.holder == i:
+                    eating[i] = True
+                    return
+
+    def putdown(i):
+        a, b = mine(i)
+        with a.cond, b.cond:
+            eating[i] = False
+            a.dirty = b.dirty = True
+            a.cond.notify_all()
+            b.cond.notify_all()
+    return pickup, putdown
+
+
+PHILOSOPHER_STRATEGIES = {
+    'ordering': _ordered_forks,
+    'waiter': _waiter_forks,
+    'chandy-misra': _chandy_misra_forks,
+    'trylock': _trylock_forks,
+}
+
+
+def dining_philosophers(n=5, eat_limit=3, strategy='ordering', think=0.0, eat=0.0, duration=None):
+    """Run n philosophers and return contention metrics.
+
+    Each philosopher eats eat_limit times or, when duration is given, as often
+    as it can for that many seconds. think and eat are sleep times per meal.
+    The result has meals per second, pickup wait times in microseconds (mean,
+    p99, max) and fairness as the variance and range of meal counts.
+    """
+    if n < 2:
+        raise ValueError("need at least 2 philosophers")
+    if strategy not in PHILOSOPHER_STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    pickup, putdown = PHILOSOPHER_STRATEGIES[strategy](n)
+    meals = [0] * n
+    waits = [array('q') for _ in range(n)]
+    start_gate = threading.Barrier(n + 1)
+    stop = threading.Event()
+
     def philosopher(i):
-        left, right = forks[i], forks[(i+1)%n]
-        for _ in range(eat_limit):
-            print(f"Philosopher {i} is thinking")
-            time.sleep(0.1)
-            with left:
-                with right:
-                    print(f"Philosopher {i} is eating")
-                    time.sleep(0.1)
-        print(f"Philosopher {i} done")
+        wait = waits[i]
+        start_gate.wait()
+        while not stop.is_set() and (duration is not None or meals[i] < eat_limit):
+            if think:
+                time.sleep(think)
+            t = time.perf_counter_ns()
+            pickup(i)
+            wait.append(time.perf_counter_ns() - t)
+            if eat:
+                time.sleep(eat)
+            meals[i] += 1
+            putdown(i)
 
     threads = [threading.Thread(target=philosopher, args=(i,)) for i in range(n)]
     for t in threads: t.start()
+    start_gate.wait()
+    start = time.perf_counter()
+    if duration is not None:
+        time.sleep(duration)
+        stop.set()
     for t in threads: t.join()
-    print("Dining philosophers complete")
\ No newline at end of file
+    elapsed = time.perf_counter() - start
+
+    all_waits = sorted(w for wait in waits for w in wait)
+    total = sum(meals)
+    mean_meals = total / n
+    return {
+        'strategy': strategy, 'philosophers': n, 'meals': total, 'seconds': elapsed,
+        'meals_per_sec': total / elapsed if elapsed else 0.0,
+        'wait_mean_us': sum(all_waits) / len(all_waits) / 1000 if all_waits else 0.0,
+        'wait_p99_us': all_waits[int(len(all_waits) * 0.99)] / 1000 if all_waits else 0.0,
+        'wait_max_us': all_waits[-1] / 1000 if all_waits else 0.0,
+        'meal_variance': sum((m - mean_meals) ** 2 for m in meals) / n,
+        'meals_min': min(meals), 'meals_max': max(meals),
+    }
+
+
+def philosophers_benchmark(sizes=(5, 50, 200), strategies=tuple(PHILOSOPHER_STRATEGIES), duration=1.0,
+                           think=0.0, eat=0.0):
+    """dining_philosophers for every strategy and table size, each run for
+    duration seconds. Returns a list of result dicts."""
+    return [dining_philosophers(n, strategy=s, think=think, eat=eat, duration=duration)
+            for n in sizes for s in strategies]
+
+
+# Synchronization primitives
+# Built on one Condition each. With stats=True a primitive keeps a
+# Contention record: uncontended acquisitions cost one counter increment,
+# and only acquisitions that had to wait read the clock.
+
+class Contention:
+    """Acquisition counters for one primitive."""
+    __slots__ = ('acquisitions', 'contended', 'wait_ns', 'max_wait_ns')
+
+    def __init__(self):
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_ns = 0
+        self.max_wait_ns = 0
+
+    def waited(self, ns):
+        self.contended += 1
+        self.wait_ns += ns
+        if ns > self.max_wait_ns:
+            self.max_wait_ns = ns
+
+    def summary(self):
+        return {
+            'acquisitions': self.acquisitions, 'contended': self.contended,
+            'contended_ratio': self.contended / self.acquisitions if self.acquisitions else 0.0,
+            'wait_mean_us': self.wait_ns / self.contended / 1000 if self.contended else 0.0,
+            'wait_max_us': self.max_wait_ns / 1000,
+        }
+
+
+class _Guard:
+    __slots__ = ('enter', 'exit')
+
+    def __init__(self, enter, exit):
+        self.enter = enter
+        self.exit = exit
+
+    def __enter__(self):
+        self.enter()
+
+    def __exit__(self, *exc):
+        self.exit()
+
+
+class RWLock:
+    """Reader-writer lock: any number of readers or one writer.
+
+    mode 'reader' admits readers whenever no writer holds the lock (writers
+    can starve), 'writer' holds new readers back while a writer is waiting
+    (readers can starve), and 'fair' serves arrivals in ticket order, letting
+    consecutive readers in together. Use `with rw.read:` / `with rw.write:`
+    or the acquire/release methods.
+    """
+    MODES = ('reader', 'writer', 'fair')
+
+    def __init__(self, mode='fair', stats=False):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown RWLock mode: {mode}")
+        self.mode = mode
+        self.cond = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = False
+        self.waiting_writers = 0
+        self.next_ticket = 0 # fair mode: arrivals take tickets...
+        self.serving = 0 # ...and are admitted in order
+        self.read_stats = Contention() if stats else None
+        self.write_stats = Contention() if stats else None
+        self.read = _Guard(self.acquire_read, self.release_read)
+        self.write = _Guard(self.acquire_write, self.release_write)
+
+    def _read_blocked(self, ticket):
+        if self.writer:
+            return True
+        if self.mode == 'writer':
+            return self.waiting_writers > 0
+        return self.mode == 'fair' and ticket != self.serving
+
+    def _write_blocked(self, ticket):
+        return self.writer or self.readers > 0 or (self.mode == 'fair' and ticket != self.serving)
+
+    def _acquire(self, blocked, stats):
+        cond = self.cond
+        ticket = self.next_ticket
+        self.next_ticket += 1
+        if stats is not None:
+            stats.acquisitions += 1
+        if blocked(ticket):
+            t = time.perf_counter_ns()
+            while blocked(ticket):
+                cond.wait()
+            if stats is not None:
+                stats.waited(time.perf_counter_ns() - t)
+        if self.mode == 'fair':
+            self.serving += 1
+            cond.notify_all() # the next ticket may be a reader that can join us
+
+    def acquire_read(self):
+        with self.cond:
+            self._acquire(self._read_blocked, self.read_stats)
+            self.readers += 1
+
+    def release_read(self):
+        with self.cond:
+            self.readers -= 1
+            if self.readers == 0:
+                self.cond.notify_all()
+
+    def acquire_write(self):
+        with self.cond:
+            self.waiting_writers += 1
+            try:
+                self._acquire(self._write_blocked, self.write_stats)
+            finally:
+                self.waiting_writers -= 1
+            self.writer = True
+
+    def release_write(self):
+        with self.cond:
+            self.writer = False
+            self.cond.notify_all()
+
+    def stats(self):
+        if self.read_stats is None:
+            return None
+        return {'read': self.read_stats.summary(), 'write': self.write_stats.summary()}
+
+
+class BoundedSemaphore:
+    """Counting semaphore that refuses to be released above its initial value."""
+    def __init__(self, value=1, stats=False):
+        if value < 0:
+            raise ValueError("semaphore initial value must be >= 0")
+        self.cond = threading.Condition(threading.Lock())
+        self.value = value
+        self.initial = value
+        self.contention = Contention() if stats else None
+
+    def acquire(self, blocking=True, timeout=None):
+        with self.cond:
+            if self.contention is not None:
+                self.contention.acquisitions += 1
+            if self.value == 0:
+                if not blocking:
+                    return False
+                t = time.perf_counter_ns()
+                ok = self.cond.wait_for(lambda: self.value > 0, timeout)
+                if self.contention is not None:
+                    self.contention.waited(time.perf_counter_ns() - t)
+                if not ok:
+                    return False
+            self.value -= 1
+            return True
+
+    def release(self):
+        with self.cond:
+            if self.value >= self.initial:
+                raise ValueError("semaphore released too many times")
+            self.value += 1
+            self.cond.notify()
+
+    def __enter__(self):
+        self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def stats(self):
+        return self.contention.summary() if self.contention is not None else None
+
+
+class CyclicBarrier:
+    """Reusable barrier for a fixed number of parties.
+
+    wait() blocks until all parties have called it, then releases them all
+    and resets for the next round. The last arrival runs action (if any)
+    before the others are released. Returns the arrival index, 0 first.
+    """
+    def __init__(self, parties, action=None, stats=False):
+        if parties < 1:
+            raise ValueError("a barrier needs at least one party")
+        self.parties = parties
+        self.action = action
+        self.cond = threading.Condition(threading.Lock())
+        self.count = 0
+        self.generation = 0
+        self.contention = Contention() if stats else None
+
+    def wait(self):
+        with self.cond:
+            index = self.count
+            self.count += 1
+            if self.contention is not None:
+                self.contention.acquisitions += 1
+            if self.count == self.parties:
+                if self.action is not None:
+                    self.action()
+                self.count = 0
+                self.generation += 1
+                self.cond.notify_all()
+                return index
+            generation = self.generation
+            t = time.perf_counter_ns()
+            while generation == self.generation:
+                self.cond.wait()
+            if self.contention is not None:
+                self.contention.waited(time.perf_counter_ns() - t)
+            return index
+
+    def stats(self):
+        return self.contention.summary() if self.contention is not None else None
+
+
+def rwlock_benchmark(threads=(1, 2, 4, 8), mixes=(('read-heavy', 0.95), ('write-heavy', 0.2)),
+                     modes=('lock',) + RWLock.MODES, seconds=0.5):
+    """Operations per second on a shared dict guarded by each lock mode.
+
+    'lock' is a plain threading.Lock for both reads and writes, the global
+    serialization baseline. Each mix gives the fraction of operations that
+    are reads. Returns a list of result dicts with the RWLock contention
+    counters included.
+    """
+    results = []
+    for name, read_ratio in mixes:
+        for n in threads:
+            for mode in modes:
+                table = {k: 0 for k in range(64)}
+                if mode == 'lock':
+                    lock = threading.Lock()
+                    read = write = lock
+                    rw = None
+                else:
+                    rw = RWLock(mode, stats=True)
+                    read, write = rw.read, rw.write
+                counts = [0] * n
+                stop = threading.Event()
+                gate = threading.Barrier(n + 1)
+
+                def worker(t):
+                    rng = random.Random(t)
+                    pattern = [rng.random() < read_ratio for _ in range(1024)]
+                    ops = 0
+                    gate.wait()
+                    while not stop.is_set():
+                        for is_read in pattern:
+                            key = ops & 63
+                            if is_read:
+                                with read:
+                                    table[key]
+                            else:
+                                with write:
+                                    table[key] += 1
+                            ops += 1
+                    counts[t] = ops
+
+                workers = [threading.Thread(target=worker, args=(t,)) for t in range(n)]
+                for w in workers: w.start()
+                gate.wait()
+                start = time.perf_counter()
+                time.sleep(seconds)
+                stop.set()
+                for w in workers: w.join()
+                elapsed = time.perf_counter() - start
+                results.append({'mix': name, 'threads': n, 'mode': mode,
+                                'ops_per_sec': sum(counts) / elapsed,
+                                'contention': rw.stats() if rw is not None else None})
+    return results
+
+
+# Shared-memory ring buffer
+
+class SharedRing:
+    """Multi-producer multi-consumer channel between processes.
+
+    A fixed number of slots of slot_size bytes lives in one
+    multiprocessing.shared_memory block: a header with the next write and
+    read positions, one sequence number per slot, then the slots (a 4-byte
+    length and the payload). Two semaphores count free and filled slots so
+    producers and consumers block instead of spinning, and two locks are held
+    only long enough to claim a run of positions; the copying itself happens
+    outside them, so several producers and consumers work on different slots
+    at once. A slot's sequence number says whose turn it is (position p is
+    writable when seq == p and readable when seq == p + 1), which keeps a
+    fast consumer from reusing a slot a slower one is still reading.
+
+    put_many/get_many move a batch per lock acquisition, and
+    put_slot/get_slot give zero-copy memoryview access to a slot. The ring
+    can be passed to multiprocessing.Process; only the creating process
+    unlinks the block in close().
+    """
+    HEADER = 64 # next write position, next read position, padding
+
+    def __init__(self, slots=1024, slot_size=256):
+        self.slots = slots
+        self.slot_size = slot_size
+        self.stride = (4 + slot_size + 7) & ~7
+        self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER + slots * (8 + self.stride))
+        self.owner_pid = os.getpid()
+        self.put_lock = multiprocessing.Lock()
+        self.get_lock = multiprocessing.Lock()
+        self.spaces = multiprocessing.Semaphore(slots)
+        self.items = multiprocessing.Semaphore(0)
+        self._map()
+        self.pos[0] = self.pos[1] = 0
+        for i in range(slots):
+            self.seq[i] = i
+
+    def _map(self):
+        buf = self.shm.buf
+        end = self.HEADER + 8 * self.slots
+        self.pos = buf[:16].cast('Q')
+        self.seq = buf[self.HEADER:end].cast('Q')
+        self.data = buf[end:]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['shm'] = self.shm.name
+        for view in ('pos', 'seq', 'data'):
+            del state[view]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = shared_memory.SharedMemory(name=state['shm'])
+        self._map()
+
+    def _check(self, n):
+        if n > self.slot_size:
+            raise ValueError(f"payload of {n} bytes does not fit a {self.slot_size}-byte slot")
+
+    def _claim(self, lock, index, n):
+        with lock:
+            start = self.pos[index]
+            self.pos[index] = start + n
+        return start
+
+    def _slot(self, p, turn):
+        """Wait until slot p's sequence number reaches turn; return its offset."""
+        i = p % self.slots
+        seq = self.seq
+        while seq[i] != turn: # a slower peer is still on this slot's previous lap
+            time.sleep(0)
+        return i * self.stride
+
+    def put(self, data):
+        self.put_many((data,))
+
+    def put_many(self, items):
+        """Write every payload in items, blocking while the ring is full."""
+        items = list(items)
+        for data in items:
+            self._check(len(data))
+        data_view = self.data
+        i = 0
+        while i < len(items):
+            # Block for one free slot, then take whatever else is free. Waiting
+            # for a whole batch's worth could deadlock producers that each
+            # hold part of the ring.
+            self.spaces.acquire()
+            n = 1
+            while i + n < len(items) and self.spaces.acquire(False):
+                n += 1
+            start = self._claim(self.put_lock, 0, n)
+            for p in range(start, start + n):
+                data = items[i]
+                i += 1
+                off = self._slot(p, p)
+                length = len(data)
+                struct.pack_into('<I', data_view, off, length)
+                data_view[off + 4:off + 4 + length] = data
+                self.seq[p % self.slots] = p + 1
+            for _ in range(n):
+                self.items.release()
+
+    def get(self, timeout=None):
+        """Return one payload as bytes, or None if timeout expires first."""
+        items = self.get_many(1, timeout)
+        return items[0] if items else None
+
+    def get_many(self, max_items, timeout=None):
+        """Block for one payload, then take up to max_items that are ready."""
+        if not self.items.acquire(timeout=timeout):
+            return []
+        n = 1
+        while n < max_items and self.items.acquire(False):
+            n += 1
+        start = self._claim(self.get_lock, 1, n)
+        data_view = self.data
+        out = []
+        for p in range(start, start + n):
+            off = self._slot(p, p + 1)
+            length, = struct.unpack_from('<I', data_view, off)
+            out.append(bytes(data_view[off + 4:off + 4 + length]))
+            self.seq[p % self.slots] = p + self.slots
+        for _ in range(n):
+            self.spaces.release()
+        return out
+
+    @contextmanager
+    def put_slot(self, length):
+        """Yield a writable memoryview of length bytes; published on exit."""
+        self._check(length)
+        self.spaces.acquire()
+        p = self._claim(self.put_lock, 0, 1)
+        off = self._slot(p, p)
+        struct.pack_into('<I', self.data, off, length)
+        view = self.data[off + 4:off + 4 + length]
+        try:
+            yield view
+        finally:
+            view.release()
+            self.seq[p % self.slots] = p + 1
+            self.items.release()
+
+    @contextmanager
+    def get_slot(self):
+        """Yield a read-only memoryview of the next payload; the slot is
+        handed back to producers on exit."""
+        self.items.acquire()
+        p = self._claim(self.get_lock, 1, 1)
+        off = self._slot(p, p + 1)
+        length, = struct.unpack_from('<I', self.data, off)
+        view = self.data[off + 4:off + 4 + length].toreadonly()
+        try:
+            yield view
+        finally:
+            view.release()
+            self.seq[p % self.slots] = p + self.slots
+            self.spaces.release()
+
+    def _release(self):
+        for view in ('pos', 'seq', 'data'):
+            if view in self.__dict__:
+                self.__dict__.pop(view).release()
+
+    def close(self):
+        """Detach from the block; the creating process also unlinks it."""
+        self._release()
+        self.shm.close()
+        if os.getpid() == self.owner_pid:
+            self.shm.unlink()
+
+    def __del__(self):
+        self._release() # lets SharedMemory close its mapping when it is collected
+
+
+# Channel benchmark: SharedRing across processes against multiprocessing.Queue
+# across processes and queue.Queue across threads. Every payload starts with
+# its send time, so consumers measure end-to-end latency.
+
+STAMP = struct.Struct('<q')
+
+
+def _payload(size):
+    return STAMP.pack(time.monotonic_ns()) + bytes(size - STAMP.size)
+
+
+def _ring_producer(ring, n, size, batch):
+    for i in range(0, n, batch):
+        ring.put_many([_payload(size) for _ in range(min(batch, n - i))])
+
+
+def _ring_consumer(ring, batch, results):
+    lat = array('q')
+    done = False
+    while not done:
+        items = ring.get_many(batch)
+        stops = 0
+        now = time.monotonic_ns()
+        for data in items:
+            if data:
+                lat.append(now - STAMP.unpack_from(data)[0])
+            else:
+                stops += 1
+        if stops:
+            done = True
+            if stops > 1: # took another consumer's stop marker too
+                ring.put_many([b''] * (stops - 1))
+    results.put(lat.tobytes())
+
+
+def _queue_producer(q, n, size, batch):
+    for _ in range(n):
+        q.put(_payload(size))
+
+
+def _queue_consumer(q, batch, results):
+    lat = array('q')
+    while True:
+        data = q.get()
+        if not data:
+            break
+        lat.append(time.monotonic_ns() - STAMP.unpack_from(data)[0])
+    results.put(lat.tobytes())
+
+
+def _run_channel(kind, slots, producers, consumers, items, size, batch):
+    threaded = kind == 'queue.Queue'
+    if kind == 'ring':
+        chan = SharedRing(slots, size)
+        produce, consume = _ring_producer, _ring_consumer
+    else:
+        chan = Queue(maxsize=slots) if threaded else multiprocessing.Queue(maxsize=slots)
+        produce, consume = _queue_producer, _queue_consumer
+    results = Queue() if threaded else multiprocessing.Queue()
+    worker = threading.Thread if threaded else multiprocessing.Process
+    per = items // producers
+    cons = [worker(target=consume, args=(chan, batch, results)) for _ in range(consumers)]
+    prods = [worker(target=produce, args=(chan, per, size, batch)) for _ in range(producers)]
+    start = time.perf_counter()
+    for w in cons + prods:
+        w.start()
+    for w in prods:
+        w.join()
+    for _ in range(consumers):
+        chan.put(b'')
+    lat = array('q')
+    for _ in range(consumers):
+        lat.frombytes(results.get())
+    elapsed = time.perf_counter() - start
+    for w in cons:
+        w.join()
+    if kind == 'ring':
+        chan.close()
+    lat = sorted(lat)
+    return {
+        'channel': kind, 'slots': slots, 'producers': producers, 'consumers': consumers,
+        'items': len(lat), 'items_per_sec': len(lat) / elapsed,
+        'latency_mean_us': sum(lat) / len(lat) / 1000 if lat else 0.0,
+        'latency_p99_us': lat[int(len(lat) * 0.99)] / 1000 if lat else 0.0,
+    }
+
+
+def channel_benchmark(items=100000, slots=(64, 1024), pairs=((1, 1), (2, 2), (4, 4)), size=64, batch=32,
+                      kinds=('ring', 'multiprocessing.Queue', 'queue.Queue')):
+    """Throughput and latency of each channel kind for every buffer size and
+    (producers, consumers) pair. Returns a list of result dicts."""
+    return [_run_channel(kind, n, p, c, items, size, batch)
+            for n in slots for p, c in pairs for kind in kinds]
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from array import array
+
+# Low-overhead scheduler event tracing.
+# Events go into a ring buffer of preallocated typed arrays, so recording one
+# costs a clock read and four array stores under an uncontended lock (the
+# schedulers and the priority-service thread may record at the same time),
+# with no allocation. The buffer
+# can be dumped as Chrome trace-event JSON (chrome://tracing or Perfetto).
+
+DISPATCH, RESUME, SUSPEND, PREEMPT, EXIT = range(5)
+EVENT_NAMES = ['dispatch', 'resume', 'suspend', 'preempt', 'exit']
+
+
+class Tracer:
+    """Fixed-size ring buffer of (timestamp ns, event, job id, cpu) records.
+
+    Once full, the oldest events are overwritten. verbose controls whether
+    the schedulers also print their progress messages.
+    """
+    def __init__(self, capacity=1 << 16, enabled=True, verbose=True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.verbose = verbose
+        self.ts = array('q', [0]) * capacity
+        self.kind = array('B', [0]) * capacity
+        self.job = array('i', [0]) * capacity
+        self.cpu = array('H', [0]) * capacity
+        self.count = 0 ## total events ever recorded
+        self.lock = threading.Lock()
+
+    def record(self, kind, job_id, cpu=0):
+        if not self.enabled:
+            return
+        with self.lock:
+            i = self.count % self.capacity
+            self.ts[i] = time.monotonic_ns()
+            self.kind[i] = kind
+            self.job[i] = job_id
+            self.cpu[i] = cpu
+            self.count += 1
+
+    def clear(self):
+        with self.lock:
+            self.count = 0
+
+    def events(self):
+        """Yield (ts_ns, kind, job_id, cpu) oldest first, from a snapshot
+        taken under the lock."""
+        with self.lock:
+            count = self.count
+            ts, kind, job, cpu = self.ts[:], self.kind[:], self.job[:], self.cpu[:]
+        n = min(count, self.capacity)
+        for k in range(count - n, count):
+            i = k % self.capacity
+            yield ts[i], kind[i], job[i], cpu[i]
+
+    def to_chrome(self):
+        """Build a Chrome trace-event dict.
+
+        Each CPU is a thread; the time a job spends between resume and
+        suspend/exit is a complete ('X') event, and dispatch, preempt and exit
+        are instant events, so gaps between slices are visible directly.
+        """
+        out = []
+        running = {} ## job id -> (resume ts, cpu)
+        cpus = set()
+        for ts, kind, job_id, cpu in self.events():
+            us = ts / 1000.0
+            cpus.add(cpu)
+            if kind == RESUME:
+                running[job_id] = (us, cpu)
+            elif kind in (SUSPEND, EXIT) and job_id in running:
+                start, start_cpu = running.pop(job_id)
+                out.append({'name': f"job {job_id}", 'ph': 'X', 'ts': start, 'dur': us - start,
+                            'pid': 0, 'tid': start_cpu, 'args': {'job': job_id}})
+            if kind != RESUME and kind != SUSPEND:
+                out.append({'name': EVENT_NAMES[kind], 'ph': 'i', 's': 't', 'ts': us,
+                            'pid': 0, 'tid': cpu, 'args': {'job': job_id}})
+        for cpu in sorted(cpus):
+            out.append({'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': cpu,
+                        'args': {'name': f"CPU {cpu}"}})
+        return {'traceEvents': out, 'displayTimeUnit': 'ms'}
+
+    def dump_chrome(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome(), f)
+
+
+tracer = Tracer() ## shared by all schedulers
@@ -1,8 +1,17 @@
 import time
 import heapq
+import json
+import math
 import os
+import select
 import signal
+import subprocess
 import sys
+import threading
+from collections import deque
+
+from accounting import reap, record_exit, cpu_time, usage_summary, ProcStatSampler
+from sched_trace import tracer, DISPATCH, RESUME, SUSPEND, PREEMPT, EXIT
 
 try:
     import win32api, win32con
@@ -12,136 +21,970 @@ try:
 except ImportError:
     win32api = win32con = NtSuspendProcess = NtResumeProcess = None
 
+class ProcessControl:
+    """Stops and continues jobs a whole process group at a time.
+
+    Jobs are launched in their own process group, so each one leads it and a
+    single killpg also stops or continues any helpers it forked. Processes
+    that are not group leaders fall back to a plain kill. The *_many methods
+    switch several jobs in one call (SMP dispatch, gang switches), and the
+    time spent signalling is measured so the per-switch overhead can be
+    reported.
+    """
+    def __init__(self, use_groups=hasattr(os, 'killpg')):
+        self.use_groups = use_groups
+        self.leaders = {} ## pid -> whether it leads its own process group
+        self.ops = 0
+        self.ns = 0
+
+    def _is_leader(self, pid):
+        leader = self.leaders.get(pid)
+        if leader is None:
+            try:
+                leader = os.getpgid(pid) == pid
+            except (OSError, AttributeError):
+                leader = False
+            self.leaders[pid] = leader
+        return leader
+
+    def _signal(self, procs, sig, nt_call):
+        start = time.perf_counter_ns()
+        for proc in procs:
+            if sys.platform.startswith('win') and nt_call:
+                handle = win32api.OpenProcess(win32con.PROCESS_ALL_ACCESS, False, proc.pid)
+                nt_call(handle.handle)
+                win32api.CloseHandle(handle)
+                continue
+            try:
+                if self.use_groups and self._is_leader(proc.pid):
+                    os.killpg(proc.pid, sig)
+                else:
+                    os.kill(proc.pid, sig)
+            except ProcessLookupError: ## already exited, nothing left to stop or continue
+                self.leaders.pop(proc.pid, None)
+        self.ns += time.perf_counter_ns() - start
+        self.ops += len(procs)
+
+    def forget(self, pid):
+        """Drop what is cached about pid once its process has been reaped."""
+        self.leaders.pop(pid, None)
+
+    def suspend_many(self, procs):
+        self._signal(procs, getattr(signal, 'SIGSTOP', None), NtSuspendProcess)
+
+    def resume_many(self, procs):
+        self._signal(procs, getattr(signal, 'SIGCONT', None), NtResumeProcess)
+
+    def terminate(self, proc):
+        """Send SIGTERM to proc's group, then SIGCONT: a job stopped by a
+        scheduler would otherwise keep the signal pending and never exit."""
+        self._signal((proc,), signal.SIGTERM, None)
+        if hasattr(signal, 'SIGCONT'):
+            self._signal((proc,), signal.SIGCONT, None)
+
+    def suspend(self, proc):
+        self.suspend_many((proc,))
+
+    def resume(self, proc):
+        self.resume_many((proc,))
+
+    def summary(self):
+        mean = self.ns / self.ops / 1000 if self.ops else 0.0
+        return f"Process control: {self.ops} suspend/resume ops, {mean:.1f}us each"
+
+    def reset_stats(self):
+        self.ops = 0
+        self.ns = 0
+
+
+control = ProcessControl() ## shared by all schedulers and the shell
+
+
 def suspend_process(proc):
-    if sys.platform.startswith('win') and NtSuspendProcess:
-        handle = win32api.OpenProcess(win32con.PROCESS_ALL_ACCESS, False, proc.pid)
-        NtSuspendProcess(handle.handle)
-        win32api.CloseHandle(handle)
-    else:
-        os.kill(proc.pid, signal.SIGSTOP)
+    control.suspend(proc)
 
 
 def resume_process(proc):
-    if sys.platform.startswith('win') and NtResumeProcess:
-        handle = win32api.OpenProcess(win32con.PROCESS_ALL_ACCESS, False, proc.pid)
-        NtResumeProcess(handle.handle)
-        win32api.CloseHandle(handle)
-    else:
-        os.kill(proc.pid, signal.SIGCONT)
+    control.resume(proc)
+
+
+def terminate_process(proc):
+    control.terminate(proc)
+
+
+def suspend_all(jobs):
+    """Stop every job that is still alive and return them, in one batch."""
+    alive = [j for j in jobs if j['proc'].poll() is None]
+    control.suspend_many([j['proc'] for j in alive])
+    return alive
+
+
+def resume_job(job, cpu=0):
+    """Start a scheduling slice for job, tracing the dispatch and the resume."""
+    tracer.record(DISPATCH, job['id'], cpu)
+    resume_process(job['proc'])
+    tracer.record(RESUME, job['id'], cpu)
+
+
+def suspend_job(job, cpu=0):
+    """End job's scheduling slice."""
+    suspend_process(job['proc'])
+    tracer.record(SUSPEND, job['id'], cpu)
+
+
+class ExitWaiter:
+    """Blocks until a job's process exits or a timeout expires.
+
+    On Linux each process gets a pidfd that becomes readable the moment the
+    child exits, so the caller wakes up immediately instead of sleeping out
+    the rest of its timeout. Elsewhere it falls back to Popen.wait(timeout).
+    """
+    def __init__(self):
+        self.pidfds = {} ## pid -> pidfd, opened lazily and reused across slices
+        self.usage = {} ## pid -> rusage of children reaped here
+
+    def _pidfd(self, proc):
+        if not hasattr(os, 'pidfd_open'):
+            return None
+        fd = self.pidfds.get(proc.pid)
+        if fd is None:
+            try:
+                fd = os.pidfd_open(proc.pid)
+            except OSError: ## already reaped, or the kernel has no pidfd support
+                return None
+            self.pidfds[proc.pid] = fd
+        return fd
+
+    def wait(self, proc, timeout, events=None):
+        """Return True if proc exited within timeout seconds, False otherwise.
+
+        A timeout of None waits forever. If an EventChannel is given, the wait
+        also ends (returning False) as soon as an event is posted to it.
+        """
+        if proc.returncode is not None:
+            return True
+        fd = self._pidfd(proc)
+        if fd is not None and (events is None or events.rfd is not None):
+            poller = select.poll()
+            poller.register(fd, select.POLLIN)
+            if events is not None:
+                poller.register(events.rfd, select.POLLIN)
+            ready = poller.poll(None if timeout is None else timeout * 1000)
+            if not any(rfd == fd for rfd, _ in ready):
+                return False
+            self.usage[proc.pid] = reap(proc) ## child is already a zombie, this only reaps it
+            return True
+        if events is None:
+            try:
+                proc.wait(timeout)
+                return True
+            except subprocess.TimeoutExpired:
+                return False
+        deadline = None if timeout is None else time.time() + timeout
+        while proc.poll() is None: ## no pidfd: alternate short waits on the channel and the process
+            step = 0.01 if deadline is None else min(0.01, deadline - time.time())
+            if step <= 0 or events.wait(step):
+                return False
+        return True
+
+    def wait_any(self, procs, timeout):
+        """Wait until at least one of procs exits or timeout seconds pass.
+
+        Returns the list of procs that have exited (empty on timeout).
+        """
+        done = [p for p in procs if p.returncode is not None]
+        if done or not procs:
+            return done
+        fds = {}
+        for proc in procs:
+            fd = self._pidfd(proc)
+            if fd is None:
+                fds = None
+                break
+            fds[fd] = proc
+        if fds is not None:
+            poller = select.poll()
+            for fd in fds:
+                poller.register(fd, select.POLLIN)
+            for fd, _ in poller.poll(timeout * 1000):
+                self.usage[fds[fd].pid] = reap(fds[fd]) ## already a zombie, this only reaps it
+                done.append(fds[fd])
+            return done
+        deadline = time.time() + timeout
+        while True: ## no pidfd: poll every process in short steps
+            done = [p for p in procs if p.poll() is not None]
+            remaining = deadline - time.time()
+            if done or remaining <= 0:
+                return done
+            time.sleep(min(0.01, remaining))
+
+    def finish(self, job, when):
+        """Mark job completed at time when and record its CPU usage."""
+        job['completion_time'] = when
+        tracer.record(EXIT, job['id'], job.get('cpu', 0))
+        record_exit(job, self.usage.pop(job['proc'].pid, None))
+        self.close(job['proc'])
+
+    def close(self, proc=None):
+        pids = [proc.pid] if proc is not None else list(self.pidfds)
+        for pid in pids:
+            fd = self.pidfds.pop(pid, None)
+            if fd is not None:
+                os.close(fd)
+
+
+class EventChannel:
+    """Thread-safe feed of scheduler events.
+
+    Events are (kind, job) pairs: 'arrive' for a new job, 'exit' for a job that
+    was killed outside the scheduler and 'update' for a priority change. A
+    wakeup pipe lets a scheduler block on its running job's pidfd and on new
+    events at the same time.
+    """
+    def __init__(self):
+        self.pending = deque()
+        self.flag = threading.Event()
+        try:
+            self.rfd, self.wfd = os.pipe()
+            os.set_blocking(self.rfd, False)
+            os.set_blocking(self.wfd, False)
+        except (OSError, AttributeError):
+            self.rfd = self.wfd = None
+
+    def put(self, kind, job):
+        self.pending.append((kind, job))
+        self.flag.set()
+        if self.wfd is not None:
+            try:
+                os.write(self.wfd, b'\0')
+            except BlockingIOError: ## pipe already full, the reader is awake anyway
+                pass
+
+    def drain(self):
+        """Return every pending event and reset the wakeup state."""
+        self.flag.clear()
+        if self.rfd is not None:
+            try:
+                while os.read(self.rfd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+        events = []
+        while self.pending:
+            events.append(self.pending.popleft())
+        return events
+
+    def wait(self, timeout=None):
+        return self.flag.wait(timeout)
+
+
+class IndexedPriorityQueue:
+    """Binary heap with an index from item id to its heap entry.
+
+    push/pop are O(log n). remove() is O(1): the entry is only marked dead and
+    skipped when it reaches the top (lazy deletion). update() implements
+    decrease-key (or increase-key) by killing the old entry and pushing a new
+    one. Dead entries are compacted away once they outnumber the live ones.
+    Equal keys come out in insertion order.
+    """
+    _REMOVED = object()
+
+    def __init__(self):
+        self.heap = []
+        self.entries = {} ## item id -> [key, seq, item id, item]
+        self.counter = 0
+        self.stale = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, item_id):
+        return item_id in self.entries
+
+    def push(self, item_id, key, item):
+        if item_id in self.entries:
+            self.remove(item_id)
+        entry = [key, self.counter, item_id, item]
+        self.counter += 1
+        self.entries[item_id] = entry
+        heapq.heappush(self.heap, entry)
+
+    def update(self, item_id, key):
+        self.push(item_id, key, self.entries[item_id][3])
+
+    def remove(self, item_id):
+        entry = self.entries.pop(item_id, None)
+        if entry is None:
+            return None
+        item = entry[3]
+        entry[3] = self._REMOVED
+        self.stale += 1
+        if self.stale > len(self.entries):
+            self.heap = [e for e in self.heap if e[3] is not self._REMOVED]
+            heapq.heapify(self.heap)
+            self.stale = 0
+        return item
+
+    def _prune(self):
+        while self.heap and self.heap[0][3] is self._REMOVED:
+            heapq.heappop(self.heap)
+            self.stale -= 1
+
+    def peek(self):
+        """Return (key, item) for the smallest key without removing it, or None."""
+        self._prune()
+        if not self.heap:
+            return None
+        return self.heap[0][0], self.heap[0][3]
+
+    def pop(self):
+        """Remove and return (key, item) for the smallest key."""
+        self._prune()
+        key, _, item_id, item = heapq.heappop(self.heap)
+        del self.entries[item_id]
+        return key, item
+
+
+def print_job_stats(j):
+    cpu = cpu_time(j) ## measured CPU time when the job was reaped with wait4, else its wall-clock slices
+    ta = j['completion_time'] - j['create_time']
+    wt = ta - (cpu if cpu is not None else j['run_time'])
+    rt = j['first_scheduled'] - j['create_time']
+    print(f"Job {j['id']} ({j['cmd']}):")
+    print(f"  Turnaround time: {ta:.2f}s")
+    print(f"  Waiting       time: {wt:.2f}s")
+    print(f"  Response      time: {rt:.2f}s")
+    print(f"  Usage: {usage_summary(j)}")
+
+
+def report(jobs):
+    for j in jobs:
+        if j.get('completion_time') is None or j.get('first_scheduled') is None:
+            continue ## finished before it was ever scheduled, or still running
+        print_job_stats(j)
+    print(control.summary())
+    control.reset_stats()
 
 
 class RoundRobinScheduler:
-    def __init__(self, jobs, quantum):
+    def __init__(self, jobs, quantum, event_driven=True):
         self.jobs = jobs
         self.quantum = quantum ## define quantum as the seconds assigned to each slice
+        self.event_driven = event_driven ## wake up on job exit instead of sleeping out the whole quantum
 
     def run(self):
-        for job in self.jobs: ## restart jobs
-            if job['proc'].poll() is None:
-                suspend_process(job['proc'])
-
-        while True: ## loop until all processes are finished
-            alive = [j for j in self.jobs if j['proc'].poll() is None]
-            if not alive:
-                break
+        ready = deque(suspend_all(self.jobs)) ## restart jobs
 
-            for job in alive:
-                pid = job['proc'].pid
-                print(f"Resuming job {job['id']} (PID {pid})")
+        waiter = ExitWaiter() if self.event_driven else None
+        try:
+            while ready: ## loop until all processes are finished
+                job = ready.popleft()
+                if tracer.verbose:
+                    print(f"Resuming job {job['id']} (PID {job['proc'].pid})")
                 if job['first_scheduled'] is None:
                     job['first_scheduled'] = time.time()
-                    
+
                 slice_start = time.time()
-                resume_process(job['proc'])
+                resume_job(job)
 
-                time.sleep(self.quantum)
+                if waiter:
+                    exited = waiter.wait(job['proc'], self.quantum)
+                else:
+                    time.sleep(self.quantum)
+                    exited = job['proc'].poll() is not None
                 slice_end = time.time()
 
                 job['run_time'] += slice_end - slice_start
 
-                if job['proc'].poll() is None:
-                    print(f"Suspending job {job['id']} after {self.quantum}s") ## Once time passed, suspend the job to resume the next
-                    suspend_process(job['proc'])
+                if not exited:
+                    if tracer.verbose:
+                        print(f"Suspending job {job['id']} after {self.quantum}s") ## Once time passed, suspend the job to resume the next
+                    suspend_job(job)
+                    ready.append(job) ## only jobs still alive go back in the queue
                 else:
-                    job['completion_time'] = slice_end
-                    print(f"Job {job['id']} completed")
+                    if waiter:
+                        waiter.finish(job, slice_end)
+                    else:
+                        job['completion_time'] = slice_end
+                        tracer.record(EXIT, job['id'])
+                    if tracer.verbose:
+                        print(f"Job {job['id']} completed")
+        finally:
+            if waiter:
+                waiter.close()
 
         print("Round-Robin scheduling complete")
+        report(self.jobs)
 
-        for j in self.jobs:
-            ta = j['completion_time'] - j['create_time']
-            wt = ta - j['run_time']
-            rt = j['first_scheduled'] - j['create_time']
-            print(f"Job {j['id']} ({j['cmd']}):")
-            print(f"  Turnaround time: {ta:.2f}s")
-            print(f"  Waiting       time: {wt:.2f}s")
-            print(f"  Response      time: {rt:.2f}s")
 
+class MLFQScheduler:
+    """Multilevel feedback queue scheduler.
 
-class PriorityScheduler:
-    def __init__(self, jobs):
+    Level 0 has the shortest quantum and each level below doubles it. Every
+    job starts at level 0; a job that is still running when its quantum ends
+    and spent at least busy (a fraction) of the slice on the CPU sinks one
+    level, while a job that finishes early or spends the slice mostly
+    sleeping keeps its level. CPU use during a slice is read from /proc;
+    where that is unavailable, a job still running at the end of its slice
+    counts as busy. The fraction leaves room for a hog that had to share the
+    CPU with other processes. Short and interactive jobs therefore stay in
+    the fast levels and CPU hogs drift to the long-quantum ones, where they
+    pay fewer context switches. Every boost_interval seconds all jobs move
+    back to level 0 so nothing starves.
+    """
+    def __init__(self, jobs, quantum, levels=3, boost_interval=5.0, busy=0.25):
+        if levels < 1:
+            raise ValueError("MLFQ needs at least one level")
+        if quantum <= 0 or boost_interval <= 0:
+            raise ValueError("quantum and boost interval must be positive")
+        if not 0 < busy <= 1:
+            raise ValueError("busy must be in (0, 1]")
+        self.busy = busy
         self.jobs = jobs
+        self.quanta = [quantum * 2 ** i for i in range(levels)]
+        self.queues = [deque() for _ in range(levels)]
+        self.boost_interval = boost_interval
+        self.sampler = ProcStatSampler()
+
+    def _cpu(self, job):
+        usage = self.sampler.sample(job['proc'].pid)
+        return None if usage is None else usage[0] + usage[1]
+
+    def _boost(self):
+        for queue in self.queues[1:]:
+            self.queues[0].extend(queue)
+            queue.clear()
 
     def run(self):
-        for job in self.jobs:
-            if job['proc'].poll() is None:
-                suspend_process(job['proc'])
+        self.queues[0].extend(suspend_all(self.jobs))
 
-        heap = [(-j['priority'], j) for j in self.jobs if j['proc'].poll() is None] ## initialize the heap based on priority
-        heapq.heapify(heap) ## sort the heap.
+        next_boost = time.time() + self.boost_interval
+        waiter = ExitWaiter()
+        try:
+            while any(self.queues):
+                if time.time() >= next_boost:
+                    if tracer.verbose:
+                        print("Boosting all jobs to level 0")
+                    self._boost()
+                    next_boost = time.time() + self.boost_interval
 
-        while heap: ## iterate through the heap
-            neg_p, job = heapq.heappop(heap)
-            prio = -neg_p
-            proc = job['proc']
+                level = next(i for i, q in enumerate(self.queues) if q)
+                job = self.queues[level].popleft()
+                quantum = self.quanta[level]
+                if tracer.verbose:
+                    print(f"Resuming job {job['id']} at level {level} (quantum {quantum}s)")
+                if job['first_scheduled'] is None:
+                    job['first_scheduled'] = time.time()
 
-            if proc.poll() is not None:
-                continue
+                cpu_start = self._cpu(job)
+                slice_start = time.time()
+                resume_job(job)
+                exited = waiter.wait(job['proc'], quantum)
+                slice_end = time.time()
+                job['run_time'] += slice_end - slice_start
 
-            print(f"Running job {job['id']} (priority={prio})")
-            if job['first_scheduled'] is None:
-                job['first_scheduled'] = time.time()
-            
-            slice_start = time.time()
-            resume_process(proc)
-            slice_end = time.time()
-
-            while proc.poll() is None:
-                higher = [j for j in self.jobs
-                          if j['proc'].poll() is None
-                          and j['priority'] > prio]
-                if higher:
-                    pre = higher[0] ## if incoming priority is higher, then pause current job
-                    print(f"Preempting job {job['id']} for job {pre['id']}")
-                    slice_end = time.time()
-                    suspend_process(proc)
-                    heapq.heappush(heap, (-prio, job))
-                    job = pre
-                    prio = job['priority']
-                    proc = job['proc']
-                    if job['first_scheduled'] is None:
-                        job['first_scheduled'] = time.time()
-                    slice_start = time.time()
-                    resume_process(proc)
+                if exited:
+                    waiter.finish(job, slice_end)
+                    self.sampler.forget(job['proc'].pid)
+                    if tracer.verbose:
+                        print(f"Job {job['id']} completed")
                 else:
-                    time.sleep(0.5)
-                
-                if slice_end is None:
-                    slice_end = time.time()
-                job['run_time'] += slice_end - slice_start
+                    suspend_job(job)
+                    cpu_end = self._cpu(job)
+                    if cpu_start is None or cpu_end is None or cpu_end - cpu_start >= self.busy * (slice_end - slice_start):
+                        level = min(level + 1, len(self.queues) - 1) ## spent its slice computing, so demote it
+                    self.queues[level].append(job)
+        finally:
+            waiter.close()
+            self.sampler.close()
 
-            print(f"Job {job['id']} completed")
-            if slice_end is None:
+        print("MLFQ scheduling complete")
+        report(self.jobs)
+
+
+class BurstPredictor:
+    """Exponential average of each command line's CPU bursts.
+
+    tau' = alpha * t + (1 - alpha) * tau, where t is the burst just observed.
+    Estimates are kept per command line and, if a path is given, saved as JSON
+    so they carry over between runs.
+    """
+    def __init__(self, alpha=0.5, initial=1.0, path=None):
+        self.alpha = alpha
+        self.initial = initial
+        self.path = path
+        self.estimates = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.estimates = json.load(f)
+            except (OSError, ValueError):
+                self.estimates = {}
+
+    def predict(self, cmd):
+        return self.estimates.get(cmd, self.initial)
+
+    def update(self, cmd, burst):
+        tau = self.predict(cmd)
+        self.estimates[cmd] = self.alpha * burst + (1 - self.alpha) * tau
+        return self.estimates[cmd]
+
+    def save(self):
+        if self.path:
+            with open(self.path, 'w') as f:
+                json.dump(self.estimates, f)
+
+
+class SRTFScheduler:
+    """Shortest-remaining-time-first using predicted bursts.
+
+    Each job's burst is predicted from its command line's history by a
+    BurstPredictor. Ready jobs sit in an IndexedPriorityQueue keyed on
+    predicted remaining time, so every decision costs O(log n). A job runs
+    until its estimate is used up (at least min_slice); if it is still alive
+    its estimate is doubled and it is requeued, letting shorter jobs preempt
+    it. When a job exits its measured run time feeds back into the predictor.
+    """
+    def __init__(self, jobs, predictor=None, min_slice=0.05):
+        self.jobs = jobs
+        self.predictor = predictor if predictor is not None else BurstPredictor()
+        self.min_slice = min_slice
+        self.ready = IndexedPriorityQueue()
+
+    def run(self):
+        estimate = {} ## job id -> predicted total burst
+        for job in suspend_all(self.jobs):
+            estimate[job['id']] = self.predictor.predict(job['cmd'])
+            self.ready.push(job['id'], estimate[job['id']] - job['run_time'], job)
+
+        waiter = ExitWaiter()
+        try:
+            while self.ready:
+                remaining, job = self.ready.pop()
+                slice_len = max(remaining, self.min_slice)
+                if tracer.verbose:
+                    print(f"Running job {job['id']} (predicted remaining {remaining:.2f}s)")
+                if job['first_scheduled'] is None:
+                    job['first_scheduled'] = time.time()
+
+                slice_start = time.time()
+                resume_job(job)
+                exited = waiter.wait(job['proc'], slice_len)
                 slice_end = time.time()
-            job['completion_time'] = slice_end
+                job['run_time'] += slice_end - slice_start
+
+                if exited:
+                    waiter.finish(job, slice_end)
+                    tau = self.predictor.update(job['cmd'], job['run_time'])
+                    if tracer.verbose:
+                        print(f"Job {job['id']} completed, next prediction {tau:.2f}s")
+                else:
+                    suspend_job(job)
+                    estimate[job['id']] = max(2 * estimate[job['id']], job['run_time'] + self.min_slice) ## ran past its prediction
+                    self.ready.push(job['id'], estimate[job['id']] - job['run_time'], job)
+        finally:
+            waiter.close()
+            self.predictor.save()
+
+        print("SRTF scheduling complete")
+        report(self.jobs)
+
+
+class PriorityScheduler:
+    """Preemptive priority scheduler (higher 'priority' runs first).
+
+    Ready jobs live in an IndexedPriorityQueue. New work arrives through an
+    EventChannel, and the scheduler sleeps on the running job's exit and the
+    channel together, so a higher-priority arrival preempts the running job
+    right away instead of on the next poll. run() returns once every job has
+    finished; serve() keeps waiting for new arrivals.
+    """
+    def __init__(self, jobs, events=None):
+        self.jobs = jobs
+        self.events = events if events is not None else EventChannel()
+        self.ready = IndexedPriorityQueue()
+        self.running = None
+        self.slice_start = None
+
+    def submit(self, job):
+        self.events.put('arrive', job)
+
+    @staticmethod
+    def _key(job):
+        return -job.get('priority', 0)
+
+    def _stop_running(self):
+        job = self.running
+        job['run_time'] += time.time() - self.slice_start
+        self.running = None
+        return job
+
+    def _start(self, job):
+        if tracer.verbose:
+            print(f"Running job {job['id']} (priority={job.get('priority', 0)})")
+        if job['first_scheduled'] is None:
+            job['first_scheduled'] = time.time()
+        self.slice_start = time.time()
+        resume_job(job)
+        self.running = job
+
+    def _handle_events(self):
+        events = self.events.drain()
+        self._enqueue_all([job for kind, job in events if kind == 'arrive' and job is not self.running])
+        for kind, job in events:
+            if kind == 'exit':
+                self.ready.remove(job['id'])
+            elif kind == 'update' and job['id'] in self.ready:
+                self.ready.update(job['id'], self._key(job))
+
+        top = self.ready.peek()
+        if self.running is not None and top is not None and top[0] < self._key(self.running):
+            pre = top[1]
+            job = self._stop_running() ## incoming priority is higher, so pause current job
+            tracer.record(PREEMPT, job['id'])
+            if tracer.verbose:
+                print(f"Preempting job {job['id']} for job {pre['id']}")
+            suspend_job(job)
+            self.ready.push(job['id'], self._key(job), job)
+
+    def _dispatch(self):
+        while self.ready:
+            _, job = self.ready.pop()
+            if job['proc'].poll() is None:
+                self._start(job)
+                return
+            if job['completion_time'] is None: ## killed while it was waiting
+                job['completion_time'] = time.time()
+
+    def _loop(self, forever):
+        waiter = ExitWaiter()
+        try:
+            while True:
+                self._handle_events()
+                if self.running is None:
+                    self._dispatch()
+                if self.running is None:
+                    if not forever:
+                        break
+                    self.events.wait()
+                    continue
+
+                if waiter.wait(self.running['proc'], None, self.events):
+                    job = self._stop_running()
+                    waiter.finish(job, time.time())
+                    if tracer.verbose:
+                        print(f"Job {job['id']} completed")
+                    if forever:
+                        print_job_stats(job)
+        finally:
+            waiter.close()
+
+    def _enqueue_all(self, jobs):
+        for job in suspend_all(jobs):
+            self.ready.push(job['id'], self._key(job), job)
+
+    def run(self):
+        self._enqueue_all(self.jobs)
+        self._loop(forever=False)
 
         print("Priority scheduling complete")
+        report(self.jobs)
+
+    def serve(self):
+        self._enqueue_all(self.jobs)
+        self._loop(forever=True)
+
+
+def pin_process(proc, cpu):
+    """Pin proc to a single CPU where the platform supports it."""
+    if hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(proc.pid, {cpu})
+        except OSError: ## process already gone, or cpu not allowed
+            pass
+
+
+class SMPScheduler:
+    """Round-robin over several CPUs at once.
+
+    Keeps up to ncpus jobs running concurrently (default os.cpu_count()). Each
+    CPU has its own run queue; a CPU whose queue runs dry steals from the tail
+    of the longest other queue. Dispatched jobs are pinned to their CPU with
+    os.sched_setaffinity, and per-core utilization is reported at the end.
+    """
+    def __init__(self, jobs, quantum, ncpus=None):
+        self.jobs = jobs
+        self.quantum = quantum
+        self.ncpus = ncpus or os.cpu_count() or 1
+        if hasattr(os, 'sched_getaffinity'):
+            allowed = sorted(os.sched_getaffinity(0))
+        else:
+            allowed = list(range(os.cpu_count() or 1))
+        self.cpu_ids = [allowed[i % len(allowed)] for i in range(self.ncpus)] ## logical cpu -> real cpu to pin to
+        self.queues = [deque() for _ in range(self.ncpus)]
+        self.running = [None] * self.ncpus
+        self.slice_start = [0.0] * self.ncpus
+        self.deadline = [0.0] * self.ncpus
+        self.busy = [0.0] * self.ncpus
+        self.slices = [0] * self.ncpus
+        self.steals = [0] * self.ncpus
+
+    def _steal(self, cpu):
+        victim = max(range(self.ncpus), key=lambda c: len(self.queues[c]))
+        if victim == cpu or not self.queues[victim]:
+            return None
+        self.steals[cpu] += 1
+        return self.queues[victim].pop()
+
+    def _dispatch(self, cpu, starts):
+        """Pick the next job for cpu and add it to the batch of jobs to resume."""
+        job = self.queues[cpu].popleft() if self.queues[cpu] else self._steal(cpu)
+        if job is None:
+            return
+        if tracer.verbose:
+            print(f"CPU {cpu}: resuming job {job['id']} (PID {job['proc'].pid})")
+        pin_process(job['proc'], self.cpu_ids[cpu])
+        job['cpu'] = cpu
+        now = time.time()
+        if job['first_scheduled'] is None:
+            job['first_scheduled'] = now
+        self.running[cpu] = job
+        self.slice_start[cpu] = now
+        self.deadline[cpu] = now + self.quantum
+        self.slices[cpu] += 1
+        starts.append(job)
+
+    def _switch(self, stops, starts):
+        """Suspend and resume whole batches of jobs, one killpg per job."""
+        if stops:
+            control.suspend_many([j['proc'] for j in stops])
+            for job in stops:
+                tracer.record(SUSPEND, job['id'], job['cpu'])
+        if starts:
+            for job in starts:
+                tracer.record(DISPATCH, job['id'], job['cpu'])
+            control.resume_many([j['proc'] for j in starts])
+            for job in starts:
+                tracer.record(RESUME, job['id'], job['cpu'])
+
+    def _end_slice(self, cpu, now):
+        job = self.running[cpu]
+        self.running[cpu] = None
+        job['run_time'] += now - self.slice_start[cpu]
+        self.busy[cpu] += now - self.slice_start[cpu]
+        return job
+
+    def run(self):
+        alive = suspend_all(self.jobs)
+        for i, job in enumerate(alive): ## spread the initial jobs evenly across cpus
+            self.queues[i % self.ncpus].append(job)
+
+        start = time.time()
+        waiter = ExitWaiter()
+        try:
+            starts = []
+            for cpu in range(self.ncpus):
+                self._dispatch(cpu, starts)
+            self._switch([], starts)
+
+            while any(self.running):
+                active = [j for j in self.running if j is not None]
+                timeout = max(0.0, min(self.deadline[j['cpu']] for j in active) - time.time())
+                exited = waiter.wait_any([j['proc'] for j in active], timeout)
+                now = time.time()
+                stops, starts = [], []
+
+                for cpu in range(self.ncpus):
+                    job = self.running[cpu]
+                    if job is None:
+                        continue
+                    if job['proc'] in exited:
+                        self._end_slice(cpu, now)
+                        waiter.finish(job, now)
+                        if tracer.verbose:
+                            print(f"CPU {cpu}: job {job['id']} completed")
+                        self._dispatch(cpu, starts)
+                    elif now >= self.deadline[cpu]:
+                        if not any(self.queues):
+                            self.deadline[cpu] = now + self.quantum ## nothing else to run, keep going
+                            continue
+                        self._end_slice(cpu, now)
+                        if tracer.verbose:
+                            print(f"CPU {cpu}: suspending job {job['id']} after {self.quantum}s")
+                        stops.append(job)
+                        self._dispatch(cpu, starts) ## pick (or steal) the next job first, so this one is not picked again
+                        self.queues[cpu].append(job)
+
+                for cpu in range(self.ncpus): ## idle cpus try to steal work requeued elsewhere
+                    if self.running[cpu] is None:
+                        self._dispatch(cpu, starts)
+                self._switch(stops, starts)
+        finally:
+            waiter.close()
+        elapsed = time.time() - start
+
+        print("SMP scheduling complete")
+        report(self.jobs)
+        for cpu in range(self.ncpus):
+            util = 100.0 * self.busy[cpu] / elapsed if elapsed > 0 else 0.0
+            print(f"CPU {cpu} (core {self.cpu_ids[cpu]}): {util:.1f}% busy, "
+                  f"{self.slices[cpu]} slices, {self.steals[cpu]} steals")
+
+
+NICE_STEP = 1.25 ## CFS gives each nice level about 1.25x the CPU weight of the next
+
+
+def set_nice(proc, nice):
+    """Set proc's nice value, returning False if the OS refused."""
+    if not hasattr(os, 'setpriority'):
+        return False
+    try:
+        os.setpriority(os.PRIO_PROCESS, proc.pid, nice)
+        return True
+    except (PermissionError, ProcessLookupError):
+        return False
+
+
+class FairShareScheduler:
+    """Proportional-share scheduling done by the kernel.
+
+    Instead of stopping and continuing jobs, every job keeps running and is
+    given a nice value so that CFS splits the CPU in proportion to its
+    weight ('weight' in the job dict, or 1.25 ** priority, so one priority
+    step is one nice level). The Python loop only wakes every interval to
+    measure each job's CPU share from /proc and nudge nice values when a job
+    drifts from its target. Unprivileged users can only raise nice values, so
+    an over-served job is niced up, and an under-served one is helped by
+    nicing up everybody else. Every job's nice stays within window levels of
+    the value its weight gives it, so measurement noise cannot ratchet all
+    jobs up to 19; when moving everybody would leave that window, only the
+    most over-served job is niced up, or the correction is skipped.
+    """
+    def __init__(self, jobs, interval=1.0, tolerance=0.25, window=3):
+        self.jobs = jobs
+        self.interval = interval
+        self.tolerance = tolerance
+        self.window = window
+        self.sampler = ProcStatSampler()
+        self.nice = {} ## job id -> nice value we set
+        self.base_nice = {} ## job id -> nice value derived from its weight
+        self.overlap = {} ## job id -> [own CPU, everybody's CPU, target CPU] over intervals shared with other jobs
+        self.base = {} ## job id -> CPU seconds when this scheduler took over
+        self.last = {} ## job id -> CPU seconds at the previous sample
+        self.cpu = {} ## job id -> CPU seconds consumed under this scheduler, set on exit
+
+    @staticmethod
+    def weight(job):
+        return job.get('weight') or NICE_STEP ** job.get('priority', 0)
+
+    def _assign_nice(self, jobs):
+        top = max(self.weight(j) for j in jobs)
+        for job in jobs:
+            nice = min(19, round(math.log(top / self.weight(job), NICE_STEP)))
+            if set_nice(job['proc'], nice):
+                self.nice[job['id']] = nice
+                self.base_nice[job['id']] = nice
+
+    def _sample(self, job):
+        """Return the CPU seconds job used since the previous sample."""
+        usage = self.sampler.sample(job['proc'].pid)
+        if usage is None:
+            return 0.0
+        total = usage[0] + usage[1]
+        self.base.setdefault(job['id'], total)
+        delta = total - self.last.get(job['id'], total)
+        self.last[job['id']] = total
+        return delta
+
+    def _can_renice(self, job, step):
+        nice = self.nice.get(job['id'])
+        if nice is None:
+            return False
+        base = self.base_nice[job['id']]
+        return max(-20, base - self.window) <= nice + step <= min(19, base + self.window)
+
+    def _renice(self, job, step):
+        """Move job's nice by step if that stays in its window; True on success."""
+        if not self._can_renice(job, step) or not set_nice(job['proc'], self.nice[job['id']] + step):
+            return False
+        self.nice[job['id']] += step
+        return True
+
+    def _rebalance(self, alive):
+        deltas = {j['id']: self._sample(j) for j in alive}
+        used = sum(deltas.values())
+        if used <= 0 or len(alive) < 2:
+            return
+        total_weight = sum(self.weight(j) for j in alive)
+        ratio = {}
+        for job in alive:
+            target = self.weight(job) / total_weight
+            acc = self.overlap.setdefault(job['id'], [0.0, 0.0, 0.0])
+            acc[0] += deltas[job['id']]
+            acc[1] += used
+            acc[2] += used * target
+            ratio[job['id']] = deltas[job['id']] / used / target
+        for job in alive:
+            if ratio[job['id']] > 1 + self.tolerance:
+                self._renice(job, 1)
+            elif ratio[job['id']] < 1 - self.tolerance:
+                if self._renice(job, -1): ## only allowed with privileges
+                    break
+                others = [o for o in alive if o is not job]
+                if all(self._can_renice(o, 1) for o in others):
+                    for other in others:
+                        self._renice(other, 1)
+                else: ## everybody else moving would leave a window: slow down only the worst offender
+                    self._renice(max(others, key=lambda o: ratio[o['id']]), 1)
+                break ## one correction per interval, then measure again
+
+    def run(self):
+        alive = [j for j in self.jobs if j['proc'].poll() is None]
+        if not alive:
+            print("Fair-share scheduling complete")
+            return
+        start = time.time()
+        loop_cpu = time.process_time()
+        self._assign_nice(alive)
+        for job in alive:
+            self._sample(job) ## baseline for the first interval
+            if job['first_scheduled'] is None:
+                job['first_scheduled'] = start
+        control.resume_many([j['proc'] for j in alive]) ## everybody runs, the kernel shares the CPU
+
+        waiter = ExitWaiter()
+        try:
+            while alive:
+                exited = waiter.wait_any([j['proc'] for j in alive], self.interval)
+                now = time.time()
+                if exited:
+                    for job in [j for j in alive if j['proc'] in exited]:
+                        alive.remove(job)
+                        job['run_time'] += now - start
+                        waiter.finish(job, now)
+                        total = cpu_time(job) ## exact from wait4, else the last /proc sample
+                        if total is None:
+                            total = self.last.get(job['id'], 0.0)
+                        self.cpu[job['id']] = total - self.base.get(job['id'], 0.0)
+                        self.sampler.forget(job['proc'].pid)
+                        if tracer.verbose:
+                            print(f"Job {job['id']} completed")
+                    for job in alive:
+                        self._sample(job) ## the interval had a different set of jobs: do not count it
+                else:
+                    self._rebalance(alive)
+        finally:
+            waiter.close()
+            self.sampler.close()
+        loop_cpu = time.process_time() - loop_cpu
 
-        for j in self.jobs:
-            ta = j['completion_time'] - j['create_time']
-            wt = ta - j['run_time']
-            rt = j['first_scheduled'] - j['create_time']
-            print(f"Job {j['id']} ({j['cmd']}):")
-            print(f"  Turnaround time: {ta:.2f}s")
-            print(f"  Waiting       time: {wt:.2f}s")
-            print(f"  Response      time: {rt:.2f}s")
\ No newline at end of file
+        print("Fair-share scheduling complete")
+        report(self.jobs)
+        for job in [j for j in self.jobs if j['id'] in self.cpu]:
+            ## shares over the intervals this job ran alongside others, so early exits do not skew them
+            own, used, target = self.overlap.get(job['id'], (0.0, 0.0, 0.0))
+            shares = (f"target share {100.0 * target / used:.1f}%, achieved {100.0 * own / used:.1f}%"
+                      if used > 0 else "ran alone, no share to compare")
+            print(f"Job {job['id']}: nice {self.nice.get(job['id'], 'n/a')}, "
+                  f"cpu {self.cpu[job['id']]:.2f}s, {shares}")
+        print(f"Control loop CPU time: {loop_cpu:.3f}s over {time.time() - start:.2f}s")
@@ -0,0 +1,17 @@
+import pytest
+
+from mrc import StackDistance, miss_ratio_curve
+
+
+@pytest.mark.parametrize('rate', [0, -0.5, 1.5, 2.0])
+def test_sample_rate_out_of_range(rate):
+    with pytest.raises(ValueError):
+        StackDistance(rate)
+    with pytest.raises(ValueError):
+        miss_ratio_curve([1, 2, 1], 2, rate)
+
+
+def test_full_sample_rate_counts_every_fault():
+    faults, refs = miss_ratio_curve([1, 2, 1, 3, 1], 3, 1.0)
+    assert refs == 5
+    assert list(faults) == [5, 3, 3]
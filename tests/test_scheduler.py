@@ -0,0 +1,38 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from scheduler import ProcessControl
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'killpg'), reason="needs POSIX process groups")
+
+
+def _wait_stopped(pid, timeout=5):
+    """Wait until pid shows as stopped in /proc (where there is one)."""
+    if not os.path.exists(f'/proc/{pid}/stat'):
+        return True
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with open(f'/proc/{pid}/stat') as f:
+            if f.read().rsplit(')', 1)[1].split()[0] == 'T':
+                return True
+        time.sleep(0.01)
+    return False
+
+
+def test_terminate_suspended_job():
+    proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'], start_new_session=True)
+    control = ProcessControl()
+    try:
+        control.suspend(proc)
+        assert _wait_stopped(proc.pid)
+        control.terminate(proc)
+        assert proc.wait(timeout=5) == -signal.SIGTERM
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()